@@ -0,0 +1,68 @@
+"""
+Command-line batch runner.
+
+Streams a CSV or JSONL catalog through the pipeline and writes
+one NDJSON result line per product as soon as it is ready:
+
+    python analyze_catalog.py catalog.csv -o results.ndjson \
+        --validation-concurrency 32 --download-concurrency 16 --inference-concurrency 4
+
+With --rescore only products whose images, category, prompt version
+or model changed since the last run are sent to the model (needs
+RESULTS_STORE_BACKEND=sqlite).
+"""
+
+import argparse
+import asyncio
+
+from services.batch import BATCH_MAX_IN_FLIGHT, detect_format, iter_catalog_rows, run_catalog
+from services.clients import close_clients
+from services.results_store import get_results_store
+from services.stage_limits import StageLimits
+from utils.helpers import to_json
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+async def run(args):
+    limits = StageLimits.for_batch(
+        args.validation_concurrency,
+        args.download_concurrency,
+        args.inference_concurrency,
+    )
+    fmt = args.format or detect_format(args.catalog)
+    out = open(args.output, "wb")
+
+    try:
+        with open(args.catalog, newline="", encoding="utf-8") as lines:
+            async for result in run_catalog(iter_catalog_rows(lines, fmt), limits, args.max_in_flight, args.rescore):
+                out.write(to_json(result) + b"\n")
+                out.flush()
+    finally:
+        out.close()
+        await close_clients()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a product catalog (CSV or JSONL).")
+    parser.add_argument("catalog", help="Path to the catalog file")
+    parser.add_argument("-o", "--output", required=True, help="NDJSON output path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Override format detection")
+    parser.add_argument("--validation-concurrency", type=positive_int)
+    parser.add_argument("--download-concurrency", type=positive_int)
+    parser.add_argument("--inference-concurrency", type=positive_int)
+    parser.add_argument("--max-in-flight", type=positive_int, default=BATCH_MAX_IN_FLIGHT)
+    parser.add_argument("--rescore", action="store_true", help="Skip products whose stored fingerprint is unchanged")
+    args = parser.parse_args()
+    if args.rescore and get_results_store() is None:
+        print("--rescore has no effect: set RESULTS_STORE_BACKEND=sqlite to keep results between runs")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
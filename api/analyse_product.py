@@ -1,16 +1,148 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from schemas.request import ProductIngestRequest
-from services.aggregator import orchestrator
-import json
+from schemas.response import AnalyzeProductResponse
+from services.aggregator import orchestrator, orchestrator_events
+from services.batch import detect_format, iter_catalog_rows, run_catalog
+from services.jobs import QueueFullError, get_job_queue
+from services.result_cache import get_result_cache
+from services.results_store import get_results_store
+from services.stage_limits import StageLimits
+from exceptions.errors import ModelUnavailableError
+from utils.helpers import store_call, to_json
+import io
+import tempfile
 
 router = APIRouter()
 
-@router.post("/analyze-product")
-async def analyze_product_endpoint(request: ProductIngestRequest):
+STREAM_MEDIA_TYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
+def _http_error(e: Exception) -> HTTPException:
+    if isinstance(e, ModelUnavailableError):
+        headers = {"Retry-After": str(int(e.retry_after) + 1)} if e.retry_after is not None else None
+        return HTTPException(status_code=503, detail=str(e), headers=headers)
+    return HTTPException(status_code=400, detail=str(e))
+
+def _stream_format(http_request: Request, stream: str | None):
+    """?stream=sse|ndjson, or an Accept header asking for either."""
+    if stream:
+        if stream not in STREAM_MEDIA_TYPES:
+            raise HTTPException(status_code=422, detail="stream must be 'sse' or 'ndjson'")
+        return stream
+    accept = http_request.headers.get("accept", "")
+    for fmt, media_type in STREAM_MEDIA_TYPES.items():
+        if media_type in accept:
+            return fmt
+    return None
+
+def _encode_event(fmt: str, event: str, data) -> bytes:
+    if fmt == "sse":
+        return b"event: " + event.encode() + b"\ndata: " + to_json(data) + b"\n\n"
+    return to_json({"event": event, "data": data}) + b"\n"
+
+# The pipeline already returns a validated AnalyzeProductResponse; handing back
+# a Response skips FastAPI's re-validation and jsonable_encoder pass, while
+# response_model still documents the contract in the OpenAPI schema.
+@router.post("/analyze-product", response_model=AnalyzeProductResponse)
+async def analyze_product_endpoint(request: ProductIngestRequest, http_request: Request, stream: str | None = None):
+    """
+    Runs the full pipeline for one product.
+
+    Opt-in streaming (`?stream=sse|ndjson` or a matching Accept
+    header) sends `validation`, `dedup`, `cache`, `download`,
+    `preprocess` and `inference` events as they happen, then a
+    `result` event carrying the usual response body (or an `error`
+    event with the status code and detail).
+    """
+    fmt = _stream_format(http_request, stream)
+    if fmt is None:
+        try:
+            result = await orchestrator(request)
+        except Exception as e:
+            raise _http_error(e)
+        return Response(to_json(result), media_type="application/json")
+
+    async def events():
+        try:
+            async for event, data in orchestrator_events(request):
+                yield _encode_event(fmt, event, data)
+        except Exception as e:
+            error = _http_error(e)
+            yield _encode_event(fmt, "error", {"status_code": error.status_code, "detail": error.detail})
+
+    # no-cache / no buffering so proxies forward each event as it is written
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[fmt], headers=headers)
+
+@router.post("/analyze-products")
+async def analyze_products_endpoint(
+    request: Request,
+    validation_concurrency: int | None = Query(None, ge=1),
+    download_concurrency: int | None = Query(None, ge=1),
+    inference_concurrency: int | None = Query(None, ge=1),
+    rescore: bool = False,
+):
+    """
+    Batch mode. The body is a CSV (Content-Type: text/csv) or JSONL
+    catalog; results stream back as NDJSON, one line per row.
+    With `rescore=true` unchanged products come from the results store.
+    """
+    fmt = detect_format(request.headers.get("content-type"))
+    limits = StageLimits.for_batch(validation_concurrency, download_concurrency, inference_concurrency)
+
+    # Spool the upload (to disk once it gets large) so rows can be streamed back out
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+
+    async def ndjson_lines():
+        with spool:
+            lines = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+            async for result in run_catalog(iter_catalog_rows(lines, fmt), limits, rescore=rescore):
+                yield to_json(result) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@router.post("/jobs", status_code=202)
+async def submit_job_endpoint(request: ProductIngestRequest):
+    """Queues the product and returns a job ID to poll."""
+    # async on purpose: the job queue is an asyncio.Queue bound to the event loop
     try:
-        return await orchestrator(request)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        job_id = await get_job_queue().submit(request)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/jobs/{job_id}")
+async def get_job_endpoint(job_id: str):
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/cache/stats")
+async def cache_stats_endpoint():
+    cache = get_result_cache()
+    if cache is None:
+        return {"backend": "none", "hits": 0, "misses": 0, "entries": 0}
+    return await store_call(cache, cache.stats)
+
+@router.get("/results")
+def list_results_endpoint(category: str | None = None, updated_since: float | None = None, limit: int = 100, offset: int = 0):
+    """Stored results, most recently updated first. Never triggers inference."""
+    store = get_results_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Results store is disabled")
+    return store.query(category, updated_since, min(max(limit, 1), 1000), max(offset, 0))
+
+@router.get("/results/{product_id}")
+def get_result_endpoint(product_id: str):
+    store = get_results_store()
+    record = store.get(product_id) if store is not None else None
+    if record is None:
+        raise HTTPException(status_code=404, detail="No stored result for this product")
+    return record
     
 # result = await analyze_product_endpoint({
 #     "product_id": 235396,
@@ -0,0 +1,74 @@
+"""
+Load test for the async pipeline against local stub servers.
+
+Usage (from the repo root):
+    python -m benchmarks.load_stage2 --requests 64 --concurrency 1 8 32
+
+With a blocking Stage 2 the requests/s stay flat as concurrency
+grows; with the async Stage 2 they scale until the stubs saturate.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.stubs import image_server, model_server
+
+
+async def run_level(orchestrator, make_request, total: int, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with gate:
+            await orchestrator(make_request(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--images", type=int, default=6)
+    parser.add_argument("--image-latency", type=float, default=0.05)
+    parser.add_argument("--model-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with image_server(args.image_latency) as images, model_server(args.model_latency) as model:
+        os.environ["GEMINI_API_KEY"] = "stub"
+        os.environ["GEMINI_BASE_URL"] = model.url
+        # The stub serves a handful of image variants, so products repeat the same
+        # bytes; the result cache and results store are off so every product hits Stage 2
+        os.environ["RESULT_CACHE_BACKEND"] = "none"
+        os.environ["RESULTS_STORE_BACKEND"] = "none"
+
+        # Imported late so the pipeline picks up the stub configuration
+        from schemas.request import ProductIngestRequest
+        from services.aggregator import orchestrator
+        from services.clients import close_clients
+
+        def make_request(i):
+            return ProductIngestRequest(
+                product_id=i,
+                category="Eyeglasses",
+                declared_image_count=args.images,
+                image_urls=[f"{images.url}/img/{i}-{n}.jpg" for n in range(args.images)],
+            )
+
+        async def run_all():
+            baseline = None
+            for concurrency in args.concurrency:
+                elapsed = await run_level(orchestrator, make_request, args.requests, concurrency)
+                rps = args.requests / elapsed
+                baseline = baseline or rps
+                print(f"concurrency={concurrency:<4} {elapsed:7.2f}s  {rps:7.2f} req/s  x{rps / baseline:.1f}")
+            await close_clients()
+
+        asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Exercises the model governor against the fake model backend.
+
+Usage (from the repo root):
+    python -m benchmarks.model_governor --calls 60 --concurrency 30 --quota 5
+
+Scenario "quota": the stub answers 429 above `--quota` req/s; the
+token bucket should back off towards the quota and most calls succeed.
+Scenario "outage": every call fails; the circuit breaker should open
+and the remaining calls fail fast instead of waiting on retries.
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.stubs import model_server
+
+
+async def drive(governor, client, calls: int, concurrency: int) -> dict:
+    from exceptions.errors import ModelUnavailableError
+
+    gate = asyncio.Semaphore(concurrency)
+    outcome = {"ok": 0, "unavailable": 0}
+
+    async def one():
+        async with gate:
+            try:
+                await governor.call(
+                    lambda: client.aio.models.generate_content(model="stub", contents=["ping"])
+                )
+                outcome["ok"] += 1
+            except ModelUnavailableError:
+                outcome["unavailable"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    outcome["elapsed_s"] = round(time.perf_counter() - start, 2)
+    await client.aio.aclose()
+    outcome["final_rate"] = round(governor.bucket.rate, 2)
+    outcome["final_concurrency"] = round(governor.concurrency.limit, 2)
+    outcome["circuit"] = governor.breaker.state
+    return {**outcome, **governor.stats}
+
+
+def run_scenario(name: str, server, args):
+    with server as model:
+        from services.clients import build_model_client
+        from services.model_governor import ModelGovernor
+
+        # Settings are read once per process, so each scenario passes its stub URL explicitly
+        governor = ModelGovernor(backoff_base=0.2, backoff_max=2.0)
+        client = build_model_client(api_key="stub", base_url=model.url)
+        result = asyncio.run(drive(governor, client, args.calls, args.concurrency))
+        print(f"{name:<7} {result}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--quota", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    run_scenario("quota", model_server(args.latency, quota_rps=args.quota), args)
+    run_scenario("outage", model_server(args.latency, fail_rate=1.0), args)
+
+
+if __name__ == "__main__":
+    main()
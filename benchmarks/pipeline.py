@@ -0,0 +1,276 @@
+"""
+Reproducible offline benchmark for the full pipeline.
+
+Usage (from the repo root):
+    python -m benchmarks.pipeline --target orchestrator app --concurrency 1 8 32 -o report.json
+
+The image CDN and the vision model are replaced by the seeded stubs
+in benchmarks.stubs, each in its own process. Every target is driven
+at each concurrency level and the JSON report records, per level,
+requests/s, end-to-end and per-stage p50/p95/p99 latencies (from the
+same spans that feed Server-Timing) and the peak RSS of this process
+while each stage was in flight. Preprocessing runs in a worker pool,
+so its RSS is reported separately as `preprocess_workers`.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from benchmarks.stubs import FAKE_ANALYSIS, image_server, model_server, serve_in_subprocess
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _rss_bytes(pid="self") -> int:
+    """Resident set size from /proc (Linux only; 0 elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _preprocess_worker_pids() -> list:
+    from services import preprocessing
+
+    pool = preprocessing._pool
+    return list(pool._processes or {}) if pool is not None else []
+
+
+class RSSSampler:
+    """
+    Samples RSS every `interval` seconds in a background thread and
+    keeps the peak seen while each stage had requests in flight.
+    """
+
+    def __init__(self, in_flight, interval: float = 0.01):
+        self.in_flight = in_flight
+        self.interval = interval
+        self.peaks = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _record(self, stage: str, rss: int):
+        self.peaks[stage] = max(self.peaks.get(stage, 0), rss)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = _rss_bytes()
+            self._record("overall", rss)
+            for key, value in list(self.in_flight._values.items()):
+                if value > 0:
+                    self._record(dict(key)["stage"], rss)
+
+            workers = sum(_rss_bytes(pid) for pid in _preprocess_worker_pids())
+            if workers:
+                self._record("preprocess_workers", workers)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return {"count": len(samples), "p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2)}
+
+
+def _mb(value):
+    # None = the stage was always shorter than the sampling interval
+    return round(value / 2**20, 1) if value else None
+
+
+def parse_server_timing(header: str) -> list:
+    timings = []
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, _, dur = entry.partition(";dur=")
+        if dur:
+            timings.append((name, float(dur) / 1000))
+    return timings
+
+
+# --- Targets: each returns an async callable(payload) -> (ok, error, [(stage, seconds)]) ---
+
+@contextlib.asynccontextmanager
+async def orchestrator_target():
+    from exceptions.errors import PipelineError
+    from schemas.request import ProductIngestRequest
+    from services.aggregator import orchestrator
+    from services.clients import close_clients
+    from services.metrics import start_request_timings
+    from services.preprocessing import start_preprocess_pool
+
+    # Same warm start as the app's lifespan
+    await start_preprocess_pool()
+
+    async def call(payload: dict):
+        timings = start_request_timings()
+        try:
+            await orchestrator(ProductIngestRequest(**payload))
+            return True, None, timings
+        except PipelineError as e:
+            return False, type(e).__name__, timings
+
+    try:
+        yield call
+    finally:
+        await close_clients()
+
+
+@contextlib.asynccontextmanager
+async def app_target():
+    import httpx
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://vpms", timeout=None) as client:
+            async def call(payload: dict):
+                response = await client.post("/api/v1/analyze-product", json=payload)
+                timings = parse_server_timing(response.headers.get("server-timing", ""))
+                error = None if response.is_success else f"HTTP {response.status_code}"
+                return response.is_success, error, timings
+
+            yield call
+
+
+TARGETS = {"orchestrator": orchestrator_target, "app": app_target}
+
+
+async def run_level(call, payloads: list, concurrency: int, in_flight) -> dict:
+    gate = asyncio.Semaphore(concurrency)
+    latencies, stages, errors = [], {}, {}
+
+    async def one(payload):
+        async with gate:
+            started = time.perf_counter()
+            ok, error, timings = await call(payload)
+            latencies.append(time.perf_counter() - started)
+            for stage, elapsed in timings:
+                stages.setdefault(stage, []).append(elapsed)
+            if not ok:
+                errors[error] = errors.get(error, 0) + 1
+
+    with RSSSampler(in_flight) as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(p) for p in payloads))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(payloads) / elapsed, 2),
+        "errors": errors,
+        "latency": percentiles(latencies),
+        "stages": {
+            stage: {**percentiles(samples), "peak_rss_mb": _mb(rss.peaks.get(stage))}
+            for stage, samples in sorted(stages.items())
+        },
+        "peak_rss_mb": _mb(rss.peaks.get("overall")),
+        "preprocess_workers_peak_rss_mb": _mb(rss.peaks.get("preprocess_workers")),
+    }
+
+
+def make_payloads(image_url: str, run: str, count: int, images: int) -> list:
+    # Fresh product IDs / URLs per level so single-flight and the URL store start cold
+    return [
+        {
+            "product_id": i,
+            "category": "Eyeglasses",
+            "declared_image_count": images,
+            "image_urls": [f"{image_url}/{run}/{i}-{n}.jpg" for n in range(images)],
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", nargs="+", choices=sorted(TARGETS), default=["orchestrator", "app"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="Products per concurrency level")
+    parser.add_argument("--images", type=int, default=6, help="Images per product")
+    parser.add_argument("--image-latency", type=float, default=0.05)
+    parser.add_argument("--image-size", type=int, nargs=2, default=[1325, 636], metavar=("W", "H"))
+    parser.add_argument("--image-fail-rate", type=float, default=0.0, help="Share of image URLs answering 404")
+    parser.add_argument("--model-latency", type=float, default=0.5)
+    parser.add_argument("--model-fail-rate", type=float, default=0.0, help="Share of model calls answering 503")
+    parser.add_argument("--model-payload", help="JSON file with the analysis the fake model returns")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="benchmark_report.json")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's debug prints")
+    args = parser.parse_args()
+
+    analysis = FAKE_ANALYSIS
+    if args.model_payload:
+        with open(args.model_payload) as f:
+            analysis = json.load(f)
+
+    image_stub = serve_in_subprocess(
+        image_server, latency=args.image_latency, width=args.image_size[0], height=args.image_size[1],
+        fail_rate=args.image_fail_rate, seed=args.seed,
+    )
+    model_stub = serve_in_subprocess(
+        model_server, latency=args.model_latency, fail_rate=args.model_fail_rate, analysis=analysis, seed=args.seed,
+    )
+
+    with image_stub as image_url, model_stub as model_url:
+        os.environ["GEMINI_API_KEY"] = "stub"
+        os.environ["GEMINI_BASE_URL"] = model_url
+        # Stub images repeat across products, so the result cache would hide Stage 2
+        os.environ["RESULT_CACHE_BACKEND"] = "none"
+        os.environ["RESULTS_STORE_BACKEND"] = "none"
+
+        # Imported late so the pipeline picks up the stub configuration
+        from services.metrics import IN_FLIGHT
+
+        async def run_all():
+            results = []
+            for target in args.target:
+                async with TARGETS[target]() as call:
+                    for concurrency in args.concurrency:
+                        payloads = make_payloads(image_url, uuid.uuid4().hex[:8], args.requests, args.images)
+                        level = await run_level(call, payloads, concurrency, IN_FLIGHT)
+                        results.append({"target": target, **level})
+                        print(
+                            f"{target:<13} concurrency={concurrency:<4} {level['rps']:8.2f} req/s"
+                            f"  p50={level['latency'].get('p50_ms')}ms p99={level['latency'].get('p99_ms')}ms"
+                            f"  rss={level['peak_rss_mb']}MB errors={sum(level['errors'].values())}",
+                            file=sys.__stdout__,
+                        )
+            return results
+
+        # The pipeline prints per-request debug lines; keep the report output readable
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+            results = asyncio.run(run_all())
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "verbose")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
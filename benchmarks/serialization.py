@@ -0,0 +1,62 @@
+"""
+Per-response serialization cost, before and after the typed fast path.
+
+Usage (from the repo root):
+    python -m benchmarks.serialization --iterations 20000
+
+before: the plain dict from Stage 3 goes through FastAPI's
+        jsonable_encoder + json.dumps (what JSONResponse does), and
+        batch NDJSON lines through json.dumps.
+after:  Stage 3 validates an AnalyzeProductResponse once and
+        utils.helpers.to_json writes it (pydantic-core / orjson).
+        The "after" timings include that validation.
+"""
+
+import argparse
+import json
+import timeit
+
+from benchmarks.stubs import FAKE_ANALYSIS
+
+
+def final_output(ambiguities: int) -> dict:
+    return {
+        "product_id": "235396",
+        "visual_measurements": {
+            key: {"score": value["score"], "confidence": value["confidence"]}
+            for key, value in FAKE_ANALYSIS["visual_measurements"].items()
+        },
+        "visual_attributes": {**FAKE_ANALYSIS["visual_attributes"], "dominant_colors": ["Black", "Gold", "Brown"]},
+        "ambiguities": [f"Lighting hides detail in shot {i}" for i in range(ambiguities)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--ambiguities", type=int, default=3)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from schemas.response import AnalyzeProductResponse
+    from utils.helpers import to_json
+
+    output = final_output(args.ambiguities)
+    model = AnalyzeProductResponse.model_validate(output)
+
+    cases = {
+        "response  before (jsonable_encoder + json.dumps)": lambda: json.dumps(
+            jsonable_encoder(output), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode(),
+        "response  after  (validate once + to_json)": lambda: to_json(AnalyzeProductResponse.model_validate(output)),
+        "ndjson    before (json.dumps)": lambda: (json.dumps(output) + "\n").encode(),
+        "ndjson    after  (to_json, model already built)": lambda: to_json(model) + b"\n",
+    }
+
+    for name, fn in cases.items():
+        per_call = timeit.timeit(fn, number=args.iterations) / args.iterations
+        print(f"{name:<50} {per_call * 1e6:8.2f} us/response")
+
+
+if __name__ == "__main__":
+    main()
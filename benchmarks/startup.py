@@ -0,0 +1,62 @@
+"""
+Worker cold-start benchmark.
+
+Usage (from the repo root):
+    python -m benchmarks.startup --runs 5
+
+Each run starts a fresh interpreter, imports the app, runs the
+lifespan startup and answers one health check, then reports the
+time to import, the time until ready and the resident memory.
+--eager pre-imports the heavy model/imaging libraries first, which
+is what every worker paid for before they were loaded lazily.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("google.genai", "google.genai.types", "numpy", "PIL.Image")
+
+CHILD = r"""
+import json, os, sys, time
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+import main
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/")
+    ready = time.perf_counter()
+    with open("/proc/self/statm") as f:
+        rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+print(json.dumps({"import_s": imported - started, "ready_s": ready - started, "rss_mb": rss / 2**20}))
+"""
+
+
+def run_once(eager: bool) -> dict:
+    modules = HEAVY_MODULES if eager else ()
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, *modules],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--eager", action="store_true", help="Also measure with the heavy imports done up front")
+    args = parser.parse_args()
+
+    for label, eager in (("lazy", False), ("eager", True)) if args.eager else (("lazy", False),):
+        runs = [run_once(eager) for _ in range(args.runs)]
+        summary = {key: round(statistics.median(r[key] for r in runs), 3) for key in runs[0]}
+        print(f"{label:<6} import={summary['import_s']:.3f}s  ready={summary['ready_s']:.3f}s  rss={summary['rss_mb']:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Local stand-ins for the image CDN and the Gemini API.
+
+Both servers run in background threads (or, via serve_in_subprocess,
+in a separate process) so benchmarks can drive the real pipeline
+without touching the network. All randomness is seeded, so two runs
+with the same settings serve the same bytes and the same failures.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from PIL import Image
+
+FAKE_ANALYSIS = {
+    "product_id": "0",
+    "visual_measurements": {
+        dimension: {"score": 1.0, "confidence": 0.8, "reasoning": "stub"}
+        for dimension in (
+            "gender_expression",
+            "visual_weight",
+            "embellishment",
+            "unconventionality",
+            "formality",
+        )
+    },
+    "visual_attributes": {
+        "dominant_colors": ["Black"],
+        "transparency": "Opaque",
+        "textures": ["Matte"],
+        "wirecore_visible": None,
+    },
+    "ambiguities": [],
+}
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer:
+    """Runs a handler class on a free localhost port in a daemon thread."""
+
+    def __init__(self, handler):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _stable_fraction(text: str) -> float:
+    """Deterministic value in [0, 1) derived from `text`."""
+    return int(hashlib.md5(text.encode()).hexdigest()[:8], 16) / 0x100000000
+
+
+def make_jpeg(width: int = 1325, height: int = 636, quality: int = 90, rng: random.Random | None = None) -> bytes:
+    """
+    A random smooth pattern plus grain: structurally distinct per call
+    (so dedup keeps them apart) and roughly the size of a real catalog shot.
+    """
+    rng = rng or random.Random()
+    pattern = Image.frombytes("RGB", (4, 4), rng.randbytes(4 * 4 * 3)).resize((width, height), Image.BILINEAR)
+    grain = Image.frombytes("RGB", (width, height), rng.randbytes(width * height * 3))
+    img = Image.blend(pattern, grain, 0.3)
+    out = BytesIO()
+    img.save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+def image_server(
+    latency: float = 0.05,
+    width: int = 1325,
+    height: int = 636,
+    variants: int = 8,
+    fail_rate: float = 0.0,
+    seed: int = 0,
+) -> StubServer:
+    """
+    Serves one of `variants` distinct JPEGs for any GET (picked from
+    the path, so a URL always gets the same bytes) after `latency` seconds.
+    Supports HEAD and ETag revalidation (304). A `fail_rate` share of
+    paths (chosen deterministically from the path) answer 404.
+    """
+    rng = random.Random(seed)
+    bodies = [make_jpeg(width, height, rng=rng) for _ in range(variants)]
+    etags = [f'"{hashlib.md5(body).hexdigest()}"' for body in bodies]
+
+    class Handler(_QuietHandler):
+        def do_GET(self):
+            self._respond(with_body=True)
+
+        def do_HEAD(self):
+            self._respond(with_body=False)
+
+        def _respond(self, with_body: bool):
+            time.sleep(latency)
+            if _stable_fraction("fail:" + self.path) < fail_rate:
+                self._send(404, b"", "text/plain")
+                return
+
+            variant = int(hashlib.md5(self.path.encode()).hexdigest(), 16) % len(bodies)
+            if self.headers.get("If-None-Match") == etags[variant]:
+                self.send_response(304)
+                self.send_header("ETag", etags[variant])
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(bodies[variant])))
+            self.send_header("ETag", etags[variant])
+            self.end_headers()
+            if with_body:
+                self.wfile.write(bodies[variant])
+
+    return StubServer(Handler)
+
+
+def model_server(
+    latency: float = 0.5,
+    quota_rps: float | None = None,
+    fail_rate: float = 0.0,
+    analysis: dict | None = None,
+    seed: int = 0,
+) -> StubServer:
+    """
+    Answers generateContent calls with a canned analysis
+    (`analysis`, FAKE_ANALYSIS by default).
+
+    `quota_rps` makes it answer 429 once callers exceed that many
+    requests per second (like a saturated quota); `fail_rate` is the
+    fraction of calls answered with a 503.
+    """
+    payload = json.dumps({
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": json.dumps(analysis or FAKE_ANALYSIS)}]},
+            "finishReason": "STOP",
+        }]
+    }).encode()
+    rng = random.Random(seed)
+    quota = {"tokens": quota_rps or 0.0, "updated": time.monotonic()}
+    lock = threading.Lock()
+
+    def over_quota() -> bool:
+        if not quota_rps:
+            return False
+        with lock:
+            now = time.monotonic()
+            quota["tokens"] = min(quota_rps, quota["tokens"] + (now - quota["updated"]) * quota_rps)
+            quota["updated"] = now
+            if quota["tokens"] < 1:
+                return True
+            quota["tokens"] -= 1
+            return False
+
+    def error_body(code: int, status: str) -> bytes:
+        return json.dumps({"error": {"code": code, "message": "stub", "status": status}}).encode()
+
+    class Handler(_QuietHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if over_quota():
+                self._send(429, error_body(429, "RESOURCE_EXHAUSTED"), "application/json")
+                return
+            time.sleep(latency)
+            with lock:
+                failed = rng.random() < fail_rate
+            if failed:
+                self._send(503, error_body(503, "UNAVAILABLE"), "application/json")
+                return
+            self._send(200, payload, "application/json")
+
+    return StubServer(Handler)
+
+
+def _serve(factory, kwargs, urls):
+    with factory(**kwargs) as server:
+        urls.put(server.url)
+        server.thread.join()
+
+
+@contextmanager
+def serve_in_subprocess(factory, **kwargs):
+    """
+    Runs `factory(**kwargs)` (image_server / model_server) in its own
+    process and yields its URL, so the stub neither competes for the
+    GIL nor shows up in the benchmark's RSS.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    urls = ctx.Queue()
+    process = ctx.Process(target=_serve, args=(factory, kwargs, urls), daemon=True)
+    process.start()
+    try:
+        yield urls.get(timeout=60)
+    finally:
+        process.terminate()
+        process.join()
@@ -0,0 +1,65 @@
+"""
+Micro-batching throughput against the deterministic stub backend.
+
+Usage (from the repo root):
+    python -m benchmarks.vision_batching --requests 128 --concurrency 32 --batch-size 1 4 16
+
+No network and no API key: the stub charges a fixed cost per batch
+plus a small cost per item, so larger batches amortise the fixed part.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+
+async def run(batcher, total: int, concurrency: int, images: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        request = {
+            "product_id": str(i),
+            "prompt": "benchmark",
+            "images": [(os.urandom(64), "image/jpeg") for _ in range(images)],
+        }
+        async with gate:
+            await batcher.submit(request)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--images", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--window-ms", type=float, default=10)
+    parser.add_argument("--batch-latency", type=float, default=0.2, help="Stub cost per batch (s)")
+    parser.add_argument("--item-latency", type=float, default=0.01, help="Stub cost per item (s)")
+    parser.add_argument("--devices", type=int, default=1, help="Batches the stub runs at once")
+    args = parser.parse_args()
+
+    from services.vision_backends import MicroBatcher, StubBackend
+
+    async def run_all():
+        baseline = None
+        for size in args.batch_size:
+            backend = StubBackend(args.batch_latency, args.item_latency, args.devices)
+            batcher = MicroBatcher(backend, max_size=size, window=args.window_ms / 1000)
+            elapsed = await run(batcher, args.requests, args.concurrency, args.images)
+            rps = args.requests / elapsed
+            baseline = baseline or rps
+            print(
+                f"batch_size={size:<4} {elapsed:7.2f}s  {rps:7.2f} req/s  x{rps / baseline:.1f}"
+                f"  ({batcher.stats['batches']} batches, avg {batcher.stats['items'] / batcher.stats['batches']:.1f})"
+            )
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
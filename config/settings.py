@@ -0,0 +1,98 @@
+import os
+
+from pydantic import BaseModel, Field
+
+
+class Settings(BaseModel):
+    """
+    Every knob the service reads from the environment.
+
+    Each field is filled from the upper-cased variable of the same
+    name (e.g. `http_max_connections` <- HTTP_MAX_CONNECTIONS), with
+    a local .env file loaded first. Built once, on first import.
+    """
+
+    # --- Vision model ---
+    gemini_api_key: str | None = None
+    gemini_base_url: str | None = None
+    vision_backend: str = "gemini"  # gemini | stub
+    vision_model: str = "gemini-3-flash-preview"
+    vision_batch_size: int = Field(1, ge=1)
+    vision_batch_window_ms: float = 10
+    vision_stub_batch_latency: float = 0.2
+    vision_stub_item_latency: float = 0.01
+    vision_stub_concurrency: int = 1
+    analysis_mode: str = "product"  # product | per_image
+    images_per_call: int = Field(1, ge=1)
+
+    # --- Model governor ---
+    model_rate_limit: float = 10.0
+    model_rate_min: float = 0.5
+    model_rate_max: float = 50.0
+    model_burst: float = 5
+    model_max_concurrency: int = 16
+    model_latency_target: float = 20.0
+    model_max_retries: int = 3
+    model_backoff_base: float = 0.5
+    model_backoff_max: float = 10.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 30.0
+
+    # --- HTTP / image fetching ---
+    http_max_connections: int = 100
+    http_max_connections_per_host: int = 20
+    http_keepalive_expiry: float = 60.0
+    image_buffer_max_bytes: int = 50 * 1024 * 1024
+    image_max_bytes: int = 15 * 1024 * 1024
+    validation_mode: str = "full"  # full | headers
+    url_metadata_backend: str = "memory"  # memory | sqlite | none
+    url_metadata_path: str = "url_metadata.sqlite3"
+    url_metadata_max_age: float = 0
+    url_metadata_max_entries: int = Field(50_000, ge=1)
+
+    # --- Preprocessing / dedup / aggregation ---
+    preprocess_enabled: bool = True
+    preprocess_max_edge: int = 1024
+    preprocess_quality: int = 85
+    preprocess_workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    dedup_enabled: bool = True
+    dedup_hamming_threshold: int = 10
+    aggregation_outlier_z: float = 3.5
+    aggregation_spread_scale: float = 5.0
+
+    # --- Caches and stores ---
+    result_cache_backend: str = "memory"  # memory | sqlite | none
+    result_cache_ttl: float = 24 * 3600
+    result_cache_max_entries: int = 1024
+    result_cache_path: str = "result_cache.sqlite3"
+    result_cache_sqlite_max_entries: int = Field(100_000, ge=1)
+    results_store_backend: str = "none"  # sqlite | none (opt-in)
+    results_store_path: str = "results.sqlite3"
+
+    # --- Batch mode and jobs ---
+    batch_validation_concurrency: int = Field(32, ge=1)
+    batch_download_concurrency: int = Field(16, ge=1)
+    batch_inference_concurrency: int = Field(4, ge=1)
+    batch_max_in_flight: int = Field(64, ge=1)
+    job_queue_depth: int = 1000
+    job_workers: int = 4
+    job_store_backend: str = "memory"  # memory | sqlite
+    job_store_path: str = "jobs.sqlite3"
+    job_retention: int = 10000
+
+    @classmethod
+    def from_env(cls, dotenv: bool = True) -> "Settings":
+        if dotenv:
+            # Imported here so nothing else pays for python-dotenv
+            from dotenv import load_dotenv
+            load_dotenv()
+
+        values = {
+            name: os.environ[name.upper()]
+            for name in cls.model_fields
+            if name.upper() in os.environ
+        }
+        return cls(**values)
+
+
+settings = Settings.from_env()
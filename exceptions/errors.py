@@ -0,0 +1,21 @@
+class PipelineError(Exception):
+    """Base class for errors raised by the measurement pipeline."""
+
+
+class NoValidImagesError(PipelineError):
+    """None of the product images could be retrieved or decoded."""
+
+
+class ModelUnavailableError(PipelineError):
+    """
+    The vision model could not be reached: retries were exhausted,
+    the circuit breaker is open, or the rate limiter gave up waiting.
+    """
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ModelResponseError(PipelineError):
+    """The model answered, but not with a usable analysis."""
@@ -1,14 +1,56 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from config.settings import settings
+from fastapi.responses import PlainTextResponse
 from api.analyse_product import router
+from services.clients import init_clients, close_clients
+from services.preprocessing import start_preprocess_pool, shutdown_preprocess_pool
+from services.vision_backends import close_vision_backend
+from services.jobs import get_job_queue
+from services.metrics import render_metrics, server_timing_header, start_request_timings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Environment (and .env) was read once into `settings` at import
+    app.state.settings = settings
+    # One pooled HTTP client + one model client for the whole worker
+    app.state.clients = await init_clients()
+    # Preprocessing and dedup workers start now rather than on the first request
+    if settings.preprocess_enabled or settings.dedup_enabled:
+        await start_preprocess_pool()
+    app.state.jobs = get_job_queue()
+    await app.state.jobs.start()
+    yield
+    await app.state.jobs.stop()
+    await close_vision_backend()
+    await close_clients()
+    shutdown_preprocess_pool()
+
 
 app = FastAPI(
     title="Visual Product Measurement System - Stage 1",
     description="Image Ingestion and Validation API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.include_router(router, prefix="/api/v1")
 
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    # Spans recorded while handling the request end up in Server-Timing
+    timings = start_request_timings()
+    response = await call_next(request)
+    if timings:
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+# async: the registry is mutated by the event loop, so it is read there too
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return render_metrics()
+
 @app.get("/")
 def health_check():
     return {"status": "VPMS Stage-1 is running"}
\ No newline at end of file
@@ -1,25 +1,116 @@
-def aggregate_scores(stage2_output: dict) -> dict:
+from collections import Counter
+
+from config.settings import settings
+from schemas.response import AnalyzeProductResponse
+
+DIMENSIONS = (
+    "gender_expression",
+    "visual_weight",
+    "embellishment",
+    "unconventionality",
+    "formality",
+)
+
+# Modified z-score above which a per-image score is treated as an outlier
+OUTLIER_Z = settings.aggregation_outlier_z
+# Weighted std (in score points) at which agreement-based confidence reaches zero
+SPREAD_SCALE = settings.aggregation_spread_scale
+MAX_COLORS = 5
+
+
+def combine_measurements(scores, confidences):
+    """
+    Vectorised Stage-3 maths over an (images, dimensions) matrix.
+
+    1. Outlier rejection: per dimension, scores with a modified
+       z-score (median / MAD) above OUTLIER_Z are masked out. If
+       MAD is 0, every score off the median is masked.
+    2. Score: confidence-weighted mean of the remaining scores.
+    3. Confidence: mean confidence of the kept scores, scaled down
+       by their weighted spread (images that disagree => lower).
+
+    Returns (scores, confidences), one value per dimension.
+    """
+    import numpy as np
+
+    scores = np.clip(scores, -5.0, 5.0)
+    confidences = np.clip(confidences, 0.0, 1.0)
+
+    keep = np.ones_like(scores, dtype=bool)
+    if scores.shape[0] >= 3:
+        median = np.median(scores, axis=0)
+        deviation = np.abs(scores - median)
+        mad = np.median(deviation, axis=0)
+        # MAD = 0 means most images agree exactly (common on the model's coarse
+        # grid); any image off that consensus then gets z = inf and is dropped
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(deviation > 0, 0.6745 * deviation / mad, 0.0)
+        keep = z <= OUTLIER_Z
+
+    # Zero-confidence images still count if nothing better is available
+    weights = np.where(keep, np.maximum(confidences, 1e-6), 0.0)
+    total = weights.sum(axis=0)
+    mean = (weights * scores).sum(axis=0) / total
+    spread = np.sqrt((weights * (scores - mean) ** 2).sum(axis=0) / total)
+
+    kept_confidence = np.where(keep, confidences, 0.0).sum(axis=0) / keep.sum(axis=0)
+    agreement = np.clip(1.0 - spread / SPREAD_SCALE, 0.0, 1.0)
+    return mean, kept_confidence * agreement
+
+
+def merge_attributes(attribute_sets: list) -> dict:
+    """Majority / frequency vote over the per-image visual attributes."""
+    colors = Counter(c for attrs in attribute_sets for c in attrs.get("dominant_colors") or [])
+    textures = Counter(t for attrs in attribute_sets for t in attrs.get("textures") or [])
+    transparency = Counter(attrs["transparency"] for attrs in attribute_sets if attrs.get("transparency"))
+    wirecore = [attrs.get("wirecore_visible") for attrs in attribute_sets if attrs.get("wirecore_visible") is not None]
+
+    return {
+        "dominant_colors": [c for c, _ in colors.most_common(MAX_COLORS)],
+        "transparency": transparency.most_common(1)[0][0] if transparency else None,
+        "textures": [t for t, _ in textures.most_common()],
+        # Visible in any shot means visible
+        "wirecore_visible": any(wirecore) if wirecore else None,
+    }
+
+
+def aggregate_scores(stage2_output: dict) -> AnalyzeProductResponse:
     """
     Stage-3: Aggregation & normalization
 
     Takes raw AI output and produces final
-    product-level visual measurements.
+    product-level visual measurements. Accepts either one
+    product-level analysis or, in per-image mode, a list of
+    them under `image_analyses`. The result is validated into
+    the public response model here, once.
     """
 
-    final_measurements = {}
+    import numpy as np
 
-    for key, value in stage2_output["visual_measurements"].items():
-        score = max(-5.0, min(5.0, value["score"]))
-        confidence = max(0.0, min(1.0, value["confidence"]))
+    analyses = stage2_output.get("image_analyses") or [stage2_output]
 
-        final_measurements[key] = {
-            "score": round(score, 2),
-            "confidence": round(confidence, 2)
-        }
+    scores = np.array([[a["visual_measurements"][d]["score"] for d in DIMENSIONS] for a in analyses], dtype=float)
+    confidences = np.array([[a["visual_measurements"][d]["confidence"] for d in DIMENSIONS] for a in analyses], dtype=float)
+    final_scores, final_confidences = combine_measurements(scores, confidences)
 
-    return {
-        "product_id": stage2_output["product_id"],
-        "visual_measurements": final_measurements,
-        "visual_attributes": stage2_output.get("visual_attributes", {}),
-        "ambiguities": stage2_output.get("ambiguities", [])
+    final_measurements = {
+        key: {
+            "score": round(float(score), 2),
+            "confidence": round(float(confidence), 2)
+        }
+        for key, score, confidence in zip(DIMENSIONS, final_scores, final_confidences)
     }
+
+    if len(analyses) == 1:
+        visual_attributes = analyses[0].get("visual_attributes", {})
+    else:
+        visual_attributes = merge_attributes([a.get("visual_attributes") or {} for a in analyses])
+
+    ambiguities = list(dict.fromkeys(item for a in analyses for item in a.get("ambiguities") or []))
+
+    return AnalyzeProductResponse(
+        product_id=stage2_output["product_id"],
+        visual_measurements=final_measurements,
+        visual_attributes=visual_attributes,
+        ambiguities=ambiguities
+    )
@@ -1,20 +1,127 @@
 
 from services.image_validation import validate_product_images
-from services.vision_analysis import analyze_product
+from services.vision_analysis import PROMPT_VERSION, analyze_product
+from services.vision_backends import get_vision_backend
+from services.results_store import get_results_store
 from services.aggregation import aggregate_scores
+from services.image_fetch import ImageBuffer
+from services.result_cache import cache_key, get_result_cache
+from services.dedup import dedupe_images
+from services.stage_limits import UNLIMITED
+from services.metrics import REQUESTS, span
+from services.singleflight import SingleFlight
+from exceptions.errors import NoValidImagesError
+from schemas.response import AnalyzeProductResponse
+from utils.helpers import store_call
 import asyncio
 import json
 
+_product_flight = SingleFlight()
 
-async def orchestrator(test_input : dict) -> dict:
-    result = await validate_product_images(test_input)
+
+async def run_stages(test_input, limits=UNLIMITED, rescore=False, progress=None):
+    """
+    Runs the three stages; returns (final output, outcome label for metrics).
+
+    With `rescore`, a product whose stored fingerprint still matches
+    (same images, category, prompt version and model) is answered
+    from the results store without touching Stage 2. `progress(event,
+    data)`, if given, is called as each stage produces something.
+    """
+    # Bytes downloaded in Stage 1 are handed to Stage 2 through this buffer
+    buffer = ImageBuffer()
+    async with limits.validation:
+        with span("validation"):
+            result = await validate_product_images(test_input, buffer)
     # print(json.dumps(result, indent=2))
-    result2 = analyze_product(result)
+    if progress:
+        progress("validation", result)
+    if "error" in result:
+        raise NoValidImagesError(result["error"])
+
+    # Same category + same image bytes + same prompt/model => same output
+    model_name = get_vision_backend().model_name
+    fingerprint = cache_key(result, buffer, f"{PROMPT_VERSION}:{model_name}")
+    image_hashes = [buffer.hashes.get(url) for url in result["valid_images"]]
+    store = get_results_store()
+    if rescore and store is not None and fingerprint:
+        stored = await asyncio.to_thread(store.get, result["product_id"])
+        if stored is not None and stored["fingerprint"] == fingerprint:
+            if progress:
+                progress("cache", {"source": "results_store"})
+            return AnalyzeProductResponse.model_validate(stored["result"]), "unchanged"
+
+    cache = get_result_cache()
+    cached = await store_call(cache, cache.get, fingerprint) if cache is not None and fingerprint else None
+
+    if cached is not None:
+        if progress:
+            progress("cache", {"source": "result_cache"})
+        result2 = {**cached, "product_id": result["product_id"]}
+    else:
+        # Near-identical shots only cost tokens, keep one of each
+        with span("dedup"):
+            result = await dedupe_images(result, buffer)
+        if progress and result["duplicate_images"]:
+            progress("dedup", {"duplicate_images": result["duplicate_images"]})
+        result2 = await analyze_product(result, buffer, limits, progress)
+        if cache is not None and fingerprint:
+            await store_call(cache, cache.set, fingerprint, result2)
     # print(json.dumps(result2))
-    result3 = aggregate_scores(result2)
+    with span("aggregation"):
+        result3 = aggregate_scores(result2)
+
+    if store is not None and fingerprint:
+        await asyncio.to_thread(
+            store.put, result["product_id"], result.get("category"), fingerprint, PROMPT_VERSION, model_name,
+            image_hashes, result3,
+        )
+    return result3, "cache_hit" if cached is not None else "analyzed"
+
+
+def product_key(test_input) -> tuple:
+    """Requests for the same product and image set share one pipeline run."""
+    urls = tuple(sorted(str(url) for url in test_input.image_urls or []))
+    return str(test_input.product_id), test_input.category, urls
+
+
+async def orchestrator(test_input : dict, limits=UNLIMITED, rescore=False, progress=None) -> dict:
+    try:
+        if progress:
+            # A joined flight would only report to its first caller, so streams run their own
+            (result3, outcome), shared = await run_stages(test_input, limits, rescore, progress), False
+        else:
+            (result3, outcome), shared = await _product_flight.do(
+                product_key(test_input), lambda: run_stages(test_input, limits, rescore)
+            )
+    except Exception as e:
+        REQUESTS.inc(outcome=type(e).__name__)
+        raise
+    REQUESTS.inc(outcome="coalesced" if shared else outcome)
     return result3
 
 
+async def orchestrator_events(test_input, limits=UNLIMITED, rescore=False):
+    """
+    Streaming form of orchestrator(): yields (event, data) pairs as
+    the stages progress and ("result", final output) at the end.
+    Pipeline errors are raised after the events that preceded them.
+    """
+    events = asyncio.Queue()
+    task = asyncio.create_task(
+        orchestrator(test_input, limits, rescore, progress=lambda event, data: events.put_nowait((event, data)))
+    )
+    task.add_done_callback(lambda _: events.put_nowait(None))
+
+    try:
+        while (item := await events.get()) is not None:
+            yield item
+        yield "result", task.result()
+    finally:
+        # Client went away mid-stream: stop working on its behalf
+        task.cancel()
+
+
 
 # test_input1 = {
 #         "product_id": 231031,  # Note: It handles Int or String now
@@ -0,0 +1,90 @@
+import asyncio
+import csv
+import json
+
+from config.settings import settings
+from schemas.request import ProductIngestRequest
+from services.aggregator import orchestrator
+
+# Rows being processed at once; bounds memory for any catalog size
+BATCH_MAX_IN_FLIGHT = settings.batch_max_in_flight
+
+
+def _parse_image_urls(value):
+    """CSV cells hold either a JSON list or '|'-separated URLs."""
+    value = (value or "").strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [url.strip() for url in value.split("|") if url.strip()]
+
+
+def iter_catalog_rows(lines, fmt: str):
+    """
+    Lazily turns catalog lines into ProductIngestRequests.
+
+    `fmt` is "csv" (header row with product_id, category,
+    declared_image_count, image_urls) or "jsonl" (one request
+    object per line). Yields (line_number, request, error).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        rows = ((reader.line_num, row) for row in reader)
+    else:
+        rows = ((n, line) for n, line in enumerate(lines, start=1) if line.strip())
+
+    for line_number, row in rows:
+        try:
+            if fmt == "csv":
+                row = dict(row, image_urls=_parse_image_urls(row.get("image_urls")))
+                if not row.get("declared_image_count"):
+                    row["declared_image_count"] = len(row["image_urls"])
+                yield line_number, ProductIngestRequest(**row), None
+            else:
+                yield line_number, ProductIngestRequest.model_validate_json(row), None
+        except Exception as e:
+            yield line_number, None, f"Invalid row: {e}"
+
+
+async def _process_row(line_number, request, error, limits, rescore=False) -> dict:
+    if error:
+        return {"line": line_number, "error": error}
+    try:
+        return await orchestrator(request, limits, rescore)
+    except Exception as e:
+        return {"line": line_number, "product_id": request.product_id, "error": str(e)}
+
+
+async def run_catalog(rows, limits, max_in_flight: int = BATCH_MAX_IN_FLIGHT, rescore: bool = False):
+    """
+    Pushes catalog rows through the pipeline and yields one result
+    dict per row as soon as it finishes (completion order).
+
+    At most `max_in_flight` rows are pulled from `rows` at a time,
+    so the iterator is consumed at the pace the stages drain it.
+    With `rescore`, products whose fingerprint is unchanged come
+    straight from the results store.
+    """
+    pending = set()
+    rows = iter(rows)
+    exhausted = False
+
+    while pending or not exhausted:
+        while not exhausted and len(pending) < max_in_flight:
+            row = next(rows, None)
+            if row is None:
+                exhausted = True
+                break
+            pending.add(asyncio.create_task(_process_row(*row, limits, rescore)))
+
+        if not pending:
+            break
+
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            yield task.result()
+
+
+def detect_format(name: str) -> str:
+    """Picks csv/jsonl from a file name or content type."""
+    name = (name or "").lower()
+    return "csv" if "csv" in name else "jsonl"
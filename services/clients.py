@@ -0,0 +1,100 @@
+import asyncio
+import importlib.util
+from urllib.parse import urlsplit
+
+import httpx
+
+from config.settings import settings
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+MAX_CONNECTIONS = settings.http_max_connections
+MAX_CONNECTIONS_PER_HOST = settings.http_max_connections_per_host
+KEEPALIVE_EXPIRY = settings.http_keepalive_expiry
+
+
+def build_model_client(api_key: str | None = None, base_url: str | None = None):
+    """
+    Creates a Gemini client. GEMINI_BASE_URL (or `base_url`) points it
+    at a local stub; arguments override the settings read at startup.
+    """
+    # google-genai is slow to import; only workers that call the model pay for it
+    from google import genai
+    from google.genai import types
+
+    api_key = api_key or settings.gemini_api_key
+    if not api_key:
+        raise ValueError("API key error")
+
+    base_url = base_url or settings.gemini_base_url
+    http_options = types.HttpOptions(base_url=base_url) if base_url else None
+    return genai.Client(api_key=api_key, http_options=http_options)
+
+
+class ClientRegistry:
+    """
+    Process-wide network clients shared by every request.
+
+    Holds one keep-alive connection pool for image fetches
+    (HTTP/2 when available) and one reused model client, so
+    repeated requests to the same CDN skip TLS handshakes.
+    """
+
+    def __init__(self):
+        self.http = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            headers={"User-Agent": "Mozilla/5.0"},
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._model = None
+        self._host_slots = {}
+
+    @property
+    def model(self):
+        # Built on first use so validation-only callers don't need an API key
+        if self._model is None:
+            self._model = build_model_client()
+        return self._model
+
+    def host_slot(self, url: str) -> asyncio.Semaphore:
+        """Caps concurrent connections to a single host (httpx only limits the whole pool)."""
+        host = urlsplit(str(url)).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+        return self._host_slots[host]
+
+    async def aclose(self):
+        await self.http.aclose()
+        if self._model is not None:
+            aclose = getattr(self._model.aio, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            self._model = None
+
+
+# --- Process-wide registry ---
+_registry = None
+
+def get_clients() -> ClientRegistry:
+    """Returns the registry, creating one lazily for scripts outside the app."""
+    global _registry
+    if _registry is None:
+        _registry = ClientRegistry()
+    return _registry
+
+async def init_clients() -> ClientRegistry:
+    """Called from the FastAPI lifespan on startup."""
+    await close_clients()
+    return get_clients()
+
+async def close_clients():
+    """Called from the FastAPI lifespan on shutdown."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
@@ -0,0 +1,89 @@
+import asyncio
+from io import BytesIO
+
+from config.settings import settings
+from services.preprocessing import get_preprocess_pool
+
+DEDUP_ENABLED = settings.dedup_enabled
+# Max differing bits (out of 64) for two shots to count as the same
+DEDUP_HAMMING_THRESHOLD = settings.dedup_hamming_threshold
+
+HASH_SIZE = 8
+
+
+def dhash(data: bytes):
+    """
+    64-bit difference hash as a bool array, or None if the image
+    can't be decoded. Runs inside a worker process.
+    """
+    import numpy as np
+    from PIL import Image
+
+    try:
+        with Image.open(BytesIO(data)) as img:
+            small = img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    except Exception:
+        return None
+
+    pixels = np.asarray(small, dtype=np.int16)
+    return (pixels[:, 1:] > pixels[:, :-1]).ravel()
+
+
+def find_duplicates(hashes, threshold: int):
+    """
+    Given an (n, 64) bool matrix, returns {index: (kept_index, distance)}
+    for every row within `threshold` bits of an earlier kept row.
+    """
+    import numpy as np
+
+    distances = (hashes[:, None, :] != hashes[None, :, :]).sum(axis=2)
+    kept = np.zeros(len(hashes), dtype=bool)
+    duplicates = {}
+
+    for i in range(len(hashes)):
+        close = np.flatnonzero(kept & (distances[i] <= threshold))
+        if close.size:
+            j = close[np.argmin(distances[i, close])]
+            duplicates[i] = (int(j), int(distances[i, j]))
+        else:
+            kept[i] = True
+
+    return duplicates
+
+
+async def dedupe_images(stage1_output: dict, buffer) -> dict:
+    """
+    Drops near-identical shots from `valid_images` before Stage 2.
+
+    Only images whose bytes are in the buffer are hashed; the rest
+    are always kept. Dropped images are listed under
+    `duplicate_images` next to `invalid_images`.
+    """
+    urls = stage1_output.get("valid_images") or []
+    if not DEDUP_ENABLED or buffer is None or len(urls) < 2:
+        return stage1_output
+
+    loop = asyncio.get_running_loop()
+    pool = get_preprocess_pool()
+    hashable = [url for url in urls if url in buffer]
+    hashes = await asyncio.gather(*(
+        loop.run_in_executor(pool, dhash, buffer.get(url)[0]) for url in hashable
+    ))
+
+    hashed = [(url, h) for url, h in zip(hashable, hashes) if h is not None]
+    if len(hashed) < 2:
+        return stage1_output
+
+    import numpy as np
+
+    duplicates = find_duplicates(np.stack([h for _, h in hashed]), DEDUP_HAMMING_THRESHOLD)
+    dropped = {
+        hashed[i][0]: {"url": hashed[i][0], "duplicate_of": hashed[j][0], "hamming_distance": distance}
+        for i, (j, distance) in duplicates.items()
+    }
+
+    return {
+        **stage1_output,
+        "valid_images": [url for url in urls if url not in dropped],
+        "duplicate_images": list(dropped.values()),
+    }
@@ -0,0 +1,140 @@
+import hashlib
+
+from config.settings import settings
+from services.metrics import BYTES_DOWNLOADED
+
+# Upper bound on the image bytes kept in memory for a single request.
+# Images that don't fit are simply re-downloaded by Stage 2.
+MAX_BUFFER_BYTES = settings.image_buffer_max_bytes
+
+# Downloads of a single image are aborted past this size
+IMAGE_MAX_BYTES = settings.image_max_bytes
+
+# Bytes requested when only the file signature is needed
+SNIFF_BYTES = 1024
+
+# File signatures of the formats the vision model accepts
+MAGIC_NUMBERS = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+)
+
+
+class ImageBuffer:
+    """
+    Per-request store for image bytes fetched during Stage 1.
+
+    Stage 2 reads from here instead of downloading every
+    image a second time. The total size is bounded so one
+    product with huge images cannot exhaust worker memory.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BUFFER_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._images = {}
+        # SHA-256 of every image seen, kept even when the bytes don't fit
+        self.hashes = {}
+
+    def put(self, url: str, data: bytes, content_type: str, content_hash=None) -> bool:
+        """Stores the image, returns False if it would exceed the budget."""
+        self.hashes.setdefault(url, content_hash or hashlib.sha256(data).hexdigest())
+        if url in self._images:
+            return True
+        if self.total_bytes + len(data) > self.max_bytes:
+            return False
+
+        self._images[url] = (data, content_type)
+        self.total_bytes += len(data)
+        return True
+
+    def record_hash(self, url: str, content_hash: str):
+        """Hash of an image known to be unchanged (HTTP 304) without its bytes."""
+        self.hashes.setdefault(url, content_hash)
+
+    def get(self, url: str):
+        """Returns (bytes, content_type) or None if the image was not kept."""
+        return self._images.get(url)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._images
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+
+class ImageTooLargeError(Exception):
+    """The image is bigger than IMAGE_MAX_BYTES; the download was aborted."""
+
+
+def sniff_image_type(head: bytes):
+    """Returns the mime type implied by the file signature, or None."""
+    for magic, mime_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return mime_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis", b"heic", b"heix", b"mif1"):
+        return "image/avif" if head[8:11] == b"avi" else "image/heic"
+    return None
+
+
+async def fetch_image(clients, url: str, timeout: float = 5.0, max_bytes: int = IMAGE_MAX_BYTES, first_chunk_only: bool = False, headers=None):
+    """
+    Shared streaming fetch for both stages.
+
+    `clients` is the ClientRegistry; the request goes through its
+    pooled HTTP client under the per-host connection limit.
+    Returns (response, body). The body is read chunk by chunk and
+    the download is aborted with ImageTooLargeError past `max_bytes`,
+    so memory per image stays bounded. With `first_chunk_only` only
+    a small byte range is requested and reading stops after the first
+    chunk (enough to sniff the file signature). Non-2xx responses,
+    including 304 Not Modified to conditional `headers`, come back
+    with an empty body.
+    """
+    # Ask for just the signature; servers that ignore Range still get cut off after one chunk
+    headers = dict(headers or {})
+    if first_chunk_only:
+        headers["Range"] = f"bytes=0-{SNIFF_BYTES - 1}"
+    async with clients.host_slot(url):
+        async with clients.http.stream("GET", str(url), headers=headers, follow_redirects=True, timeout=timeout) as response:
+            if not response.is_success:
+                return response, b""
+
+            declared = response.headers.get("content-length")
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise ImageTooLargeError(f"Image is {declared} bytes (limit {max_bytes})")
+
+            chunks = []
+            received = 0
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                BYTES_DOWNLOADED.inc(len(chunk))
+                if received > max_bytes:
+                    raise ImageTooLargeError(f"Image exceeds {max_bytes} bytes")
+                chunks.append(chunk)
+                if first_chunk_only:
+                    break
+
+    return response, b"".join(chunks)
+
+
+async def head_image(clients, url: str, timeout: float = 5.0, headers=None):
+    """HEAD request through the shared pool; no body is transferred."""
+    async with clients.host_slot(url):
+        return await clients.http.head(str(url), headers=headers, follow_redirects=True, timeout=timeout)
+
+
+async def download_image(clients, url: str, timeout: float = 10.0):
+    """Downloads image and returns raw bytes + mime type."""
+    try:
+        response, body = await fetch_image(clients, url, timeout)
+        response.raise_for_status()
+        return body, response.headers.get("content-type", "image/jpeg")
+    except Exception as e:
+        print(f"  [!] Error downloading {url}: {e}")
+        return None, None
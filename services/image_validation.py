@@ -1,34 +1,136 @@
 import asyncio
+import hashlib
 import httpx
+from config.settings import settings
 from schemas.request import ProductIngestRequest
+from services.image_fetch import (
+    IMAGE_MAX_BYTES,
+    ImageTooLargeError,
+    fetch_image,
+    head_image,
+    sniff_image_type,
+)
+from services.clients import get_clients
+from services.metrics import URL_CHECK_LATENCY, span
+from services.singleflight import SingleFlight
+from services.url_metadata import (
+    conditional_headers,
+    get_url_store,
+    is_fresh,
+    metadata_from_response,
+)
+from utils.helpers import store_call
 
-# --- 1. THE HELPER FUNCTION (Checks one image) ---
-async def check_single_url(client, url):
-    try:
-        # Check headers without downloading the full image
-        response = await client.get(url, follow_redirects=True, timeout=5.0)
-        
-        # Rule 1: Status Code 200-299
-        if response.status_code < 200 or response.status_code >= 300:
-            return str(url), False, f"HTTP Status {response.status_code}"
+# "full" streams each body (kept for Stage 2), "headers" only does HEAD
+# or reads the first chunk, so validation transfers almost nothing
+VALIDATION_MODE = settings.validation_mode
 
-        # Rule 2: Content-Type must be image
-        content_type = response.headers.get("content-type", "")
-        if not content_type.startswith("image/"):
-            return str(url), False, f"Invalid Content-Type: {content_type}"
+_url_flight = SingleFlight()
 
-        return str(url), True, "OK"
+# --- 1. THE HELPER FUNCTIONS (Check one image) ---
+def check_response(response, head=None):
+    """Returns None if the response looks like a usable image, else the reason."""
+    # Rule 1: Status Code 200-299
+    if response.status_code < 200 or response.status_code >= 300:
+        return f"HTTP Status {response.status_code}"
 
-    except httpx.TimeoutException:
-        return str(url), False, "Timeout"
-    except Exception as e:
-        return str(url), False, "Unreachable / Connection Error"
+    # Rule 2: Content-Type must be image
+    content_type = response.headers.get("content-type", "")
+    if not content_type.startswith("image/"):
+        return f"Invalid Content-Type: {content_type}"
+
+    # Rule 3: Declared size within the limit (a ranged reply carries the total in Content-Range)
+    declared = response.headers.get("content-range", "").rpartition("/")[2] or response.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > IMAGE_MAX_BYTES:
+        return f"Image too large: {declared} bytes"
+
+    # Rule 4: The first bytes must carry an image file signature
+    if head is not None and sniff_image_type(head[:16]) is None:
+        return "Unrecognised image file signature"
+
+    return None
+
+async def check_headers_only(clients, url, conditional=None):
+    """Returns (response, first bytes or None) without transferring the body."""
+    response = await head_image(clients, url, headers=conditional)
+    if response.status_code in (405, 501) or (
+        response.status_code != 304 and not response.headers.get("content-type", "").startswith("image/")
+    ):
+        # HEAD unsupported or unhelpful: read just the first chunk of a GET
+        return await fetch_image(clients, url, first_chunk_only=True, headers=conditional)
+    return response, None
+
+async def probe_url(clients, url):
+    """
+    Network side of a URL check, shared by concurrent callers.
+    Returns (reason or None, body or None, content_type, content_hash).
+    """
+    # Previously seen URLs are revalidated with a conditional request
+    store = get_url_store()
+    meta = await store_call(store, store.get, url) if store is not None else None
+    if is_fresh(meta):
+        return None, None, meta.get("content_type"), meta.get("content_hash")
+    conditional = conditional_headers(meta)
+
+    if VALIDATION_MODE == "headers":
+        response, body = await check_headers_only(clients, url, conditional)
+    else:
+        # Streamed GET with a size cap; the body is kept for Stage 2
+        response, body = await fetch_image(clients, url, headers=conditional)
+
+    # 304: unchanged since a check that passed, valid without downloading it
+    # (conditional headers are only ever sent for URLs stored as valid)
+    if response.status_code == 304 and meta and meta.get("valid"):
+        await store_call(store, store.touch, url)
+        return None, None, meta.get("content_type"), meta.get("content_hash")
+
+    reason = check_response(response, body)
+    content_hash = None
+    if not reason and VALIDATION_MODE != "headers":
+        content_hash = hashlib.sha256(body).hexdigest()
+    else:
+        body = None
+
+    if store is not None:
+        await store_call(store, store.put, url, metadata_from_response(response, content_hash, valid=reason is None))
+
+    return reason, body, response.headers.get("content-type", ""), content_hash
+
+async def check_single_url(clients, url, buffer=None):
+    url = str(url)
+    with span("url_check", URL_CHECK_LATENCY):
+        try:
+            # The same URL is never fetched twice at once within a worker
+            (reason, body, content_type, content_hash), _ = await _url_flight.do(
+                url, lambda: probe_url(clients, url)
+            )
+        except ImageTooLargeError as e:
+            return url, False, str(e)
+        except httpx.TimeoutException:
+            return url, False, "Timeout"
+        except Exception as e:
+            return url, False, "Unreachable / Connection Error"
+
+    if reason:
+        return url, False, reason
+
+    if buffer is not None:
+        if body:
+            buffer.put(url, body, content_type, content_hash)
+        elif content_hash:
+            # Unchanged (304): the stored hash keeps the result cache usable without the bytes
+            buffer.record_hash(url, content_hash)
+
+    return url, True, "OK"
 
 # --- 2. THE MAIN FUNCTION (Call this!) ---
-async def validate_product_images(product_data):
+async def validate_product_images(product_data, buffer=None):
     """
     Takes a dictionary with product details.
     Returns a dictionary with validation results.
+
+    If an ImageBuffer is given, the bytes of every valid
+    image are kept in it so Stage 2 can skip the download.
     """
     
     # Extract data (Safe conversion of product_id to string)
@@ -41,10 +143,10 @@ async def validate_product_images(product_data):
     valid_images = []
     invalid_images = []
 
-    # Run checks in parallel
-    async with httpx.AsyncClient() as client:
-        tasks = [check_single_url(client, str(url)) for url in urls]
-        results = await asyncio.gather(*tasks)
+    # Run checks in parallel over the shared connection pool
+    clients = get_clients()
+    tasks = [check_single_url(clients, str(url), buffer) for url in urls]
+    results = await asyncio.gather(*tasks)
 
     # Sort results
     for url, is_valid, reason in results:
@@ -68,6 +170,7 @@ async def validate_product_images(product_data):
         "received_image_count": len(urls),
         "valid_images": valid_images,
         "invalid_images": invalid_images,
+        "duplicate_images": [],
         "status": "images_validated",
         "message": "At least one image is available for vision analysis"
     }
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+
+from config.settings import settings
+from schemas.request import ProductIngestRequest
+from services.aggregator import orchestrator
+from utils.helpers import store_call, to_json
+
+JOB_QUEUE_DEPTH = settings.job_queue_depth
+JOB_WORKERS = settings.job_workers
+# memory | sqlite
+JOB_STORE_BACKEND = settings.job_store_backend
+JOB_STORE_PATH = settings.job_store_path
+# Finished jobs kept by the memory store before the oldest are dropped
+JOB_RETENTION = settings.job_retention
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at JOB_QUEUE_DEPTH."""
+
+
+# --- Job stores ---
+
+class MemoryJobStore:
+    """Keeps job state in a dict; lost on restart."""
+
+    blocking = False
+
+    def __init__(self, retention: int = JOB_RETENTION):
+        self.retention = retention
+        self._jobs = {}
+
+    def create(self, job_id: str, request: ProductIngestRequest):
+        self._jobs[job_id] = {
+            "job_id": job_id,
+            "status": "queued",
+            "product_id": request.product_id,
+            "request": request.model_dump_json(),
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "updated_at": time.time(),
+        }
+        # dicts keep insertion order, so the first keys are the oldest jobs
+        while len(self._jobs) > self.retention:
+            del self._jobs[next(iter(self._jobs))]
+
+    def update(self, job_id: str, status: str, result=None, error=None):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.update(status=status, result=result, error=error, updated_at=time.time())
+
+    def get(self, job_id: str):
+        job = self._jobs.get(job_id)
+        return {k: v for k, v in job.items() if k != "request"} if job else None
+
+    def pending(self):
+        return []
+
+
+class SQLiteJobStore:
+    """
+    Persists job state on disk so status survives restarts and can be
+    read by any worker. Unfinished jobs are re-queued on startup.
+    """
+
+    # Calls wait on SQLite; the queue runs them in a thread
+    blocking = True
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL, product_id INTEGER,"
+            " request TEXT NOT NULL, result TEXT, error TEXT,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def create(self, job_id: str, request: ProductIngestRequest):
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO jobs (job_id, status, product_id, request, created_at, updated_at)"
+            " VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, request.product_id, request.model_dump_json(), now, now),
+        )
+
+    def update(self, job_id: str, status: str, result=None, error=None):
+        self._db.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE job_id = ?",
+            (status, to_json(result).decode() if result is not None else None, error, time.time(), job_id),
+        )
+
+    def get(self, job_id: str):
+        row = self._db.execute(
+            "SELECT job_id, status, product_id, result, error, created_at, updated_at"
+            " FROM jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def pending(self):
+        rows = self._db.execute(
+            "SELECT job_id, request FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+        ).fetchall()
+        return [(row["job_id"], ProductIngestRequest.model_validate_json(row["request"])) for row in rows]
+
+
+# --- Queue + worker pool ---
+
+class JobQueue:
+    """
+    In-process queue drained by a fixed pool of workers.
+
+    Submitting returns immediately; the bounded queue depth and the
+    worker count cap how much load reaches the model during bursts.
+    """
+
+    def __init__(self, store, depth: int = JOB_QUEUE_DEPTH, workers: int = JOB_WORKERS):
+        self.store = store
+        self.workers = workers
+        self._queue = asyncio.Queue(maxsize=depth)
+        self._tasks = []
+
+    async def submit(self, request: ProductIngestRequest) -> str:
+        if self._queue.full():
+            raise QueueFullError("Job queue is full, retry later")
+
+        job_id = uuid.uuid4().hex
+        await store_call(self.store, self.store.create, job_id, request)
+        # Re-checked: other submits may have filled the queue while the row was written
+        if self._queue.full():
+            await store_call(self.store, self.store.update, job_id, "failed", None, "Job queue is full")
+            raise QueueFullError("Job queue is full, retry later")
+        self._queue.put_nowait((job_id, request))
+        return job_id
+
+    async def get(self, job_id: str):
+        return await store_call(self.store, self.store.get, job_id)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def _worker(self):
+        while True:
+            job_id, request = await self._queue.get()
+            await store_call(self.store, self.store.update, job_id, "running")
+            try:
+                result = await orchestrator(request)
+                await store_call(self.store, self.store.update, job_id, "completed", result)
+            except Exception as e:
+                await store_call(self.store, self.store.update, job_id, "failed", None, str(e))
+            finally:
+                self._queue.task_done()
+
+    async def start(self):
+        # Jobs left over from a previous run (sqlite store only)
+        for job_id, request in await store_call(self.store, self.store.pending):
+            if self._queue.full():
+                break
+            await store_call(self.store, self.store.update, job_id, "queued")
+            self._queue.put_nowait((job_id, request))
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+# --- Process-wide queue ---
+_job_queue = None
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        store = SQLiteJobStore() if JOB_STORE_BACKEND == "sqlite" else MemoryJobStore()
+        _job_queue = JobQueue(store)
+    return _job_queue
@@ -0,0 +1,144 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Per-request list of (span name, seconds), read back for the Server-Timing header
+_request_timings = ContextVar("request_timings", default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(dict(key))} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["counts"][i] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, series in self._series.items():
+            labels = dict(key)
+            for bound, count in zip(self.buckets, series["counts"]):
+                yield f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {count}"
+            yield f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {series['count']}"
+            yield f"{self.name}_sum{_format_labels(labels)} {series['sum']}"
+            yield f"{self.name}_count{_format_labels(labels)} {series['count']}"
+
+
+# --- Process-wide metrics ---
+STAGE_LATENCY = Histogram("vpms_stage_duration_seconds", "Time spent in each pipeline stage")
+URL_CHECK_LATENCY = Histogram("vpms_url_check_duration_seconds", "Time to validate a single image URL")
+IN_FLIGHT = Gauge("vpms_stage_in_flight", "Requests currently inside each pipeline stage")
+BYTES_DOWNLOADED = Counter("vpms_image_bytes_downloaded_total", "Image bytes fetched from CDNs")
+REQUESTS = Counter("vpms_requests_total", "Finished product analyses by outcome")
+
+
+@contextmanager
+def span(stage: str, histogram: Histogram = STAGE_LATENCY, **labels):
+    """
+    Times a block: feeds the latency histogram, the in-flight gauge
+    and, inside a request, the Server-Timing header.
+    """
+    IN_FLIGHT.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        IN_FLIGHT.dec(stage=stage)
+        histogram.observe(elapsed, stage=stage, **labels)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def start_request_timings() -> list:
+    """Call at the start of a request; spans in this context append to the returned list."""
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: list) -> str:
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in timings)
+
+
+def _external_metrics():
+    """Counters owned by other modules, read at scrape time."""
+    from services.model_governor import get_model_governor
+    from services.result_cache import get_result_cache
+
+    cache = get_result_cache()
+    if cache is not None:
+        # The counters live in memory; stats() would also count SQLite rows on the loop
+        yield "# HELP vpms_result_cache_requests_total Result cache lookups by outcome"
+        yield "# TYPE vpms_result_cache_requests_total counter"
+        yield f'vpms_result_cache_requests_total{{result="hit"}} {cache.hits}'
+        yield f'vpms_result_cache_requests_total{{result="miss"}} {cache.misses}'
+
+    governor = get_model_governor()
+    yield "# HELP vpms_model_calls_total Vision model calls by outcome"
+    yield "# TYPE vpms_model_calls_total counter"
+    for outcome, value in governor.stats.items():
+        yield f'vpms_model_calls_total{{outcome="{outcome}"}} {value}'
+    yield "# HELP vpms_model_rate_limit Current model requests/s allowed by the token bucket"
+    yield "# TYPE vpms_model_rate_limit gauge"
+    yield f"vpms_model_rate_limit {governor.bucket.rate}"
+    yield "# HELP vpms_model_concurrency_limit Current adaptive model concurrency cap"
+    yield "# TYPE vpms_model_concurrency_limit gauge"
+    yield f"vpms_model_concurrency_limit {governor.concurrency.limit}"
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition format."""
+    lines = []
+    for metric in (STAGE_LATENCY, URL_CHECK_LATENCY, IN_FLIGHT, BYTES_DOWNLOADED, REQUESTS):
+        lines.extend(metric.render())
+    lines.extend(_external_metrics())
+    return "\n".join(lines) + "\n"
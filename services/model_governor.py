@@ -0,0 +1,219 @@
+import asyncio
+import random
+import time
+
+import httpx
+
+from config.settings import settings
+from exceptions.errors import ModelUnavailableError
+
+# Requests per second the bucket starts at, and the bounds AIMD moves it within
+MODEL_RATE_LIMIT = settings.model_rate_limit
+MODEL_RATE_MIN = settings.model_rate_min
+MODEL_RATE_MAX = settings.model_rate_max
+MODEL_BURST = settings.model_burst
+
+MODEL_MAX_CONCURRENCY = settings.model_max_concurrency
+# Calls slower than this count as an overload signal
+MODEL_LATENCY_TARGET = settings.model_latency_target
+
+MODEL_MAX_RETRIES = settings.model_max_retries
+MODEL_BACKOFF_BASE = settings.model_backoff_base
+MODEL_BACKOFF_MAX = settings.model_backoff_max
+
+CIRCUIT_FAILURE_THRESHOLD = settings.circuit_failure_threshold
+CIRCUIT_RESET_TIMEOUT = settings.circuit_reset_timeout
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate follows AIMD: every success adds
+    a little rate, every 429 halves it.
+    """
+
+    def __init__(self, rate=MODEL_RATE_LIMIT, burst=MODEL_BURST, min_rate=MODEL_RATE_MIN, max_rate=MODEL_RATE_MAX):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # The lock makes waiters queue up in FIFO order
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + 1.0 / max(self.rate, 1.0))
+
+    def on_throttle(self):
+        self.rate = max(self.min_rate, self.rate / 2)
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency cap that grows by one per window of successes and
+    halves on 429s or calls slower than the latency target.
+    """
+
+    def __init__(self, limit=MODEL_MAX_CONCURRENCY, max_limit=MODEL_MAX_CONCURRENCY, latency_target=MODEL_LATENCY_TARGET):
+        self.limit = float(limit)
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < max(1, int(self.limit)))
+            self.in_flight += 1
+
+    async def release(self, latency: float, throttled: bool):
+        async with self._cond:
+            self.in_flight -= 1
+            if throttled or latency > self.latency_target:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails fast until
+    `reset_timeout` has passed; then lets one trial call through.
+    """
+
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def check(self) -> bool:
+        """Raises while open; returns True if the caller is the half-open trial."""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_running):
+            retry_after = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise ModelUnavailableError("Vision model circuit is open", retry_after=max(retry_after, 0.0))
+        if state == "half_open":
+            self._trial_running = True
+            return True
+        return False
+
+    def end_trial(self):
+        """Frees the trial slot if the call ended without a verdict (e.g. cancelled)."""
+        self._trial_running = False
+
+    def on_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def on_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.failures >= self.threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+def _classify(error: Exception):
+    """Returns (retryable, throttled) for an exception from the model call."""
+    # Only the Gemini backend raises these, and by then google-genai is loaded
+    from google.genai import errors as genai_errors
+
+    if isinstance(error, genai_errors.APIError):
+        return error.code == 429 or error.code >= 500, error.code == 429
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError, asyncio.TimeoutError)):
+        return True, False
+    return False, False
+
+
+class ModelGovernor:
+    """
+    Wraps every model call with: circuit breaker -> token bucket ->
+    adaptive concurrency -> retries with full-jitter backoff.
+    """
+
+    def __init__(self, max_retries=MODEL_MAX_RETRIES, backoff_base=MODEL_BACKOFF_BASE, backoff_max=MODEL_BACKOFF_MAX):
+        self.bucket = AdaptiveTokenBucket()
+        self.concurrency = AdaptiveConcurrency()
+        self.breaker = CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {"calls": 0, "retries": 0, "throttled": 0, "failures": 0, "rejected": 0}
+
+    async def call(self, make_call):
+        """`make_call` returns a fresh awaitable each time it is invoked."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                is_trial = self.breaker.check()
+            except ModelUnavailableError:
+                self.stats["rejected"] += 1
+                raise
+
+            try:
+                await self.bucket.acquire()
+                await self.concurrency.acquire()
+                self.stats["calls"] += 1
+                started = time.monotonic()
+                throttled = False
+                try:
+                    result = await make_call()
+                except Exception as e:
+                    retryable, throttled = _classify(e)
+                    if not retryable:
+                        # Bad request etc.: the model answered, so it counts as healthy
+                        self.breaker.on_success()
+                        raise
+                    self.breaker.on_failure()
+                    if throttled:
+                        self.stats["throttled"] += 1
+                        self.bucket.on_throttle()
+                    if attempt == self.max_retries:
+                        self.stats["failures"] += 1
+                        raise ModelUnavailableError(f"Vision model failed after {attempt + 1} attempts: {e}") from e
+                else:
+                    self.breaker.on_success()
+                    self.bucket.on_success()
+                    return result
+                finally:
+                    await self.concurrency.release(time.monotonic() - started, throttled)
+            finally:
+                # A cancelled trial must not leave the breaker half-open forever
+                if is_trial:
+                    self.breaker.end_trial()
+
+            self.stats["retries"] += 1
+            await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+
+# --- Process-wide governor ---
+_governor = None
+
+def get_model_governor() -> ModelGovernor:
+    global _governor
+    if _governor is None:
+        _governor = ModelGovernor()
+    return _governor
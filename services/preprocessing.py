@@ -0,0 +1,114 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from config.settings import settings
+
+PREPROCESS_ENABLED = settings.preprocess_enabled
+PREPROCESS_MAX_EDGE = settings.preprocess_max_edge
+PREPROCESS_QUALITY = settings.preprocess_quality
+PREPROCESS_WORKERS = settings.preprocess_workers
+
+
+def downscale_image(data: bytes, mime_type: str, max_edge: int, quality: int):
+    """
+    Resizes an image so its longest edge is at most `max_edge`
+    and re-encodes it as JPEG. Runs inside a worker process.
+
+    Falls back to the original bytes if the image can't be
+    decoded or re-encoding would not make it smaller.
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img = ImageOps.exif_transpose(img)
+            if max(img.size) > max_edge:
+                img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+            # JPEG has no alpha; flatten transparent images onto white
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+
+            out = BytesIO()
+            img.save(out, "JPEG", quality=quality, optimize=True)
+    except Exception:
+        return data, mime_type
+
+    encoded = out.getvalue()
+    if len(encoded) >= len(data):
+        return data, mime_type
+    return encoded, "image/jpeg"
+
+
+# --- Process pool (keeps Pillow work off the event loop) ---
+_pool = None
+
+def get_preprocess_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # The pool is created after the event loop and HTTP threads exist, and
+        # forking a threaded process can deadlock the child; forkserver
+        # workers start from a clean single-threaded server instead
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+def _warm_worker():
+    # Pay for the imaging imports once per worker, not on the first image
+    import numpy
+    from PIL import Image
+    return True
+
+async def start_preprocess_pool():
+    """
+    Called from the FastAPI lifespan: starts every worker (workers are
+    otherwise spawned on first use, which a user request would wait for).
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_preprocess_pool()
+    await asyncio.gather(*(loop.run_in_executor(pool, _warm_worker) for _ in range(PREPROCESS_WORKERS)))
+
+def shutdown_preprocess_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def preprocess_images(images: list):
+    """
+    Downscales (bytes, mime type) pairs in the process pool.
+
+    Returns the processed list (same order, failed downloads
+    left as (None, None)) and a stats dict with byte counts.
+    """
+    stats = {"images": 0, "bytes_in": 0, "bytes_out": 0}
+    if not PREPROCESS_ENABLED:
+        return images, stats
+
+    loop = asyncio.get_running_loop()
+    pool = get_preprocess_pool()
+
+    async def process(data, mime_type):
+        if not data:
+            return data, mime_type
+        return await loop.run_in_executor(
+            pool, downscale_image, data, mime_type, PREPROCESS_MAX_EDGE, PREPROCESS_QUALITY
+        )
+
+    processed = await asyncio.gather(*(process(data, mime) for data, mime in images))
+
+    for (before, _), (after, _) in zip(images, processed):
+        if before:
+            stats["images"] += 1
+            stats["bytes_in"] += len(before)
+            stats["bytes_out"] += len(after)
+
+    return processed, stats
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+from config.settings import settings
+
+# memory | sqlite | none
+CACHE_BACKEND = settings.result_cache_backend
+CACHE_TTL = settings.result_cache_ttl
+CACHE_MAX_ENTRIES = settings.result_cache_max_entries
+CACHE_PATH = settings.result_cache_path
+CACHE_SQLITE_MAX_ENTRIES = settings.result_cache_sqlite_max_entries
+# Seconds between sweeps of expired / surplus rows in the SQLite cache
+CACHE_PURGE_INTERVAL = 60
+
+
+def cache_key(stage1_output: dict, buffer, version: str = "") -> str | None:
+    """
+    Content address for a Stage-2 result.
+
+    Built from the category, the sorted SHA-256 hashes of the
+    image bytes and `version` (prompt version + model name), so
+    re-submitted products hit regardless of URL order or product_id
+    but never across prompts or models. Returns None if any image
+    has no hash.
+    """
+    urls = stage1_output.get("valid_images") or []
+    if not urls or buffer is None:
+        return None
+
+    hashes = [buffer.hashes.get(url) for url in urls]
+    if None in hashes:
+        return None
+
+    category = str(stage1_output.get("category", "")).strip().lower()
+    material = "\n".join([category, version] + sorted(hashes))
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class MemoryCache:
+    """In-process LRU with a per-entry TTL."""
+
+    # Calls never wait on I/O, so they run directly on the event loop
+    blocking = False
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.time():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: dict):
+        self._entries[key] = (time.time() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+class SQLiteCache:
+    """
+    On-disk cache shared by every worker on the host (WAL mode).
+    Expired rows, and the soonest-expiring ones beyond `max_entries`,
+    are deleted at most every CACHE_PURGE_INTERVAL seconds on write.
+    """
+
+    # Calls wait on SQLite; async callers run them with asyncio.to_thread
+    blocking = True
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL, max_entries: int = CACHE_SQLITE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: a crash can drop recent entries but not corrupt the file
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_expires ON results (expires_at)")
+        self.purge()
+
+    def get(self, key: str):
+        row = self._db.execute(
+            "SELECT value FROM results WHERE key = ? AND expires_at >= ?",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict):
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + self.ttl),
+        )
+        if time.time() - self._purged_at >= CACHE_PURGE_INTERVAL:
+            self.purge()
+
+    def purge(self):
+        """Deletes expired rows, then the soonest-expiring rows past `max_entries`."""
+        now = time.time()
+        self._db.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+        self._db.execute(
+            "DELETE FROM results WHERE key IN"
+            " (SELECT key FROM results ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._purged_at = now
+
+    def stats(self) -> dict:
+        (entries,) = self._db.execute("SELECT COUNT(*) FROM results WHERE expires_at >= ?", (time.time(),)).fetchone()
+        return {
+            "backend": "sqlite",
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+        }
+
+
+# --- Process-wide cache ---
+_cache = None
+
+def get_result_cache():
+    """Returns the configured cache, or None when caching is disabled."""
+    global _cache
+    if _cache is None and CACHE_BACKEND != "none":
+        _cache = SQLiteCache() if CACHE_BACKEND == "sqlite" else MemoryCache()
+    return _cache
@@ -0,0 +1,87 @@
+import json
+import sqlite3
+import time
+
+from config.settings import settings
+from utils.helpers import to_json
+
+# sqlite | none
+RESULTS_STORE_BACKEND = settings.results_store_backend
+RESULTS_STORE_PATH = settings.results_store_path
+
+FIELDS = ("product_id", "category", "fingerprint", "prompt_version", "model_name", "image_hashes", "result", "updated_at")
+
+
+class ResultsStore:
+    """
+    Latest final output per product, kept on disk (WAL mode). Calls
+    block on SQLite, so async code runs them with asyncio.to_thread.
+
+    Each row carries the fingerprint it was computed from (image
+    hashes + category + prompt version + model name), so a re-score
+    run can skip products whose inputs did not change.
+    """
+
+    def __init__(self, path: str = RESULTS_STORE_PATH):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only fsyncs at checkpoints; a crash can lose the last few rows, never corrupt them
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS product_results ("
+            " product_id TEXT PRIMARY KEY, category TEXT, fingerprint TEXT NOT NULL,"
+            " prompt_version TEXT, model_name TEXT, image_hashes TEXT,"
+            " result TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS product_results_updated ON product_results (updated_at)")
+
+    @staticmethod
+    def _decode(row) -> dict:
+        record = dict(row)
+        record["image_hashes"] = json.loads(record["image_hashes"] or "[]")
+        record["result"] = json.loads(record["result"])
+        return record
+
+    def get(self, product_id):
+        row = self._db.execute(
+            f"SELECT {', '.join(FIELDS)} FROM product_results WHERE product_id = ?", (str(product_id),)
+        ).fetchone()
+        return self._decode(row) if row else None
+
+    def put(self, product_id, category: str, fingerprint: str, prompt_version: str, model_name: str, image_hashes: list, result: dict):
+        self._db.execute(
+            f"INSERT OR REPLACE INTO product_results ({', '.join(FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(product_id), category, fingerprint, prompt_version, model_name,
+                json.dumps(sorted(image_hashes)), to_json(result).decode(), time.time(),
+            ),
+        )
+
+    def query(self, category=None, updated_since=None, limit: int = 100, offset: int = 0) -> list:
+        """Most recently updated first."""
+        clauses, params = [], []
+        if category:
+            clauses.append("category = ? COLLATE NOCASE")
+            params.append(category)
+        if updated_since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(updated_since)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._db.execute(
+            f"SELECT {', '.join(FIELDS)} FROM product_results{where}"
+            " ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        ).fetchall()
+        return [self._decode(row) for row in rows]
+
+
+# --- Process-wide store ---
+_store = None
+
+def get_results_store():
+    """Returns the configured store, or None when disabled."""
+    global _store
+    if _store is None and RESULTS_STORE_BACKEND != "none":
+        _store = ResultsStore()
+    return _store
@@ -0,0 +1,32 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key.
+
+    The first caller starts the work; callers arriving while it is
+    still running await the same task and get the same result (or
+    exception). Nothing is cached once the task finishes.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+
+    async def do(self, key, make_call):
+        """
+        Runs `make_call()` unless a call with `key` is already running.
+        Returns (result, shared) where `shared` is True for joiners.
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(make_call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # shield: one caller disconnecting must not cancel everyone else's work
+        return await asyncio.shield(task), shared
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
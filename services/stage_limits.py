@@ -0,0 +1,39 @@
+import asyncio
+from contextlib import nullcontext
+
+from config.settings import settings
+
+# Defaults used by the batch endpoint and CLI
+BATCH_VALIDATION_CONCURRENCY = settings.batch_validation_concurrency
+BATCH_DOWNLOAD_CONCURRENCY = settings.batch_download_concurrency
+BATCH_INFERENCE_CONCURRENCY = settings.batch_inference_concurrency
+
+
+def _gate(limit):
+    return asyncio.Semaphore(limit) if limit else nullcontext()
+
+
+class StageLimits:
+    """
+    Separate concurrency caps for the three expensive steps:
+    URL validation, image download and model inference.
+
+    A limit of None (the default) means unbounded, which is what
+    the single-product endpoint uses.
+    """
+
+    def __init__(self, validation=None, download=None, inference=None):
+        self.validation = _gate(validation)
+        self.download = _gate(download)
+        self.inference = _gate(inference)
+
+    @classmethod
+    def for_batch(cls, validation=None, download=None, inference=None):
+        return cls(
+            validation or BATCH_VALIDATION_CONCURRENCY,
+            download or BATCH_DOWNLOAD_CONCURRENCY,
+            inference or BATCH_INFERENCE_CONCURRENCY,
+        )
+
+
+UNLIMITED = StageLimits()
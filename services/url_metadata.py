@@ -0,0 +1,127 @@
+import sqlite3
+import time
+from collections import OrderedDict
+
+from config.settings import settings
+
+# memory | sqlite | none
+URL_METADATA_BACKEND = settings.url_metadata_backend
+URL_METADATA_PATH = settings.url_metadata_path
+# Entries younger than this are trusted without any request (0 = always revalidate)
+URL_METADATA_MAX_AGE = settings.url_metadata_max_age
+# Per-worker cap for the memory backend (least recently used URLs go first)
+URL_METADATA_MAX_ENTRIES = settings.url_metadata_max_entries
+
+FIELDS = ("status", "valid", "content_type", "etag", "last_modified", "content_hash", "checked_at")
+
+
+def conditional_headers(meta) -> dict:
+    """If-None-Match / If-Modified-Since for a previously valid URL."""
+    # A 304 for a URL that failed validation would otherwise turn it valid
+    if not meta or meta.get("status") != 200 or not meta.get("valid"):
+        return {}
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def is_fresh(meta) -> bool:
+    """True if a previously valid URL was checked recently enough to skip the request."""
+    return bool(
+        URL_METADATA_MAX_AGE
+        and meta
+        and meta.get("status") == 200
+        and meta.get("valid")
+        and time.time() - meta["checked_at"] < URL_METADATA_MAX_AGE
+    )
+
+
+def metadata_from_response(response, content_hash=None, valid=False) -> dict:
+    """`valid` records whether the URL passed every validation rule."""
+    return {
+        "status": response.status_code,
+        "valid": valid,
+        "content_type": response.headers.get("content-type", ""),
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "content_hash": content_hash,
+        "checked_at": time.time(),
+    }
+
+
+class MemoryURLStore:
+    """Per-worker URL metadata (LRU, at most `max_entries` URLs); lost on restart."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = URL_METADATA_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, url: str):
+        meta = self._entries.get(url)
+        if meta is not None:
+            self._entries.move_to_end(url)
+        return meta
+
+    def put(self, url: str, meta: dict):
+        self._entries[url] = meta
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def touch(self, url: str):
+        if url in self._entries:
+            self._entries[url]["checked_at"] = time.time()
+
+
+class SQLiteURLStore:
+    """URL metadata on disk, shared by all workers and across re-syncs."""
+
+    # Calls wait on SQLite; probe_url runs them in a thread
+    blocking = True
+
+    def __init__(self, path: str = URL_METADATA_PATH):
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS url_metadata ("
+            " url TEXT PRIMARY KEY, status INTEGER, valid INTEGER NOT NULL DEFAULT 0,"
+            " content_type TEXT, etag TEXT, last_modified TEXT, content_hash TEXT, checked_at REAL)"
+        )
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(url_metadata)")}
+        if "valid" not in columns:
+            # Older files: existing rows count as unvalidated and get fully re-checked
+            self._db.execute("ALTER TABLE url_metadata ADD COLUMN valid INTEGER NOT NULL DEFAULT 0")
+
+    def get(self, url: str):
+        row = self._db.execute(
+            f"SELECT {', '.join(FIELDS)} FROM url_metadata WHERE url = ?", (url,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def put(self, url: str, meta: dict):
+        self._db.execute(
+            f"INSERT OR REPLACE INTO url_metadata (url, {', '.join(FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, *(meta.get(field) for field in FIELDS)),
+        )
+
+    def touch(self, url: str):
+        self._db.execute("UPDATE url_metadata SET checked_at = ? WHERE url = ?", (time.time(), url))
+
+
+# --- Process-wide store ---
+_store = None
+
+def get_url_store():
+    """Returns the configured store, or None when disabled."""
+    global _store
+    if _store is None and URL_METADATA_BACKEND != "none":
+        _store = SQLiteURLStore() if URL_METADATA_BACKEND == "sqlite" else MemoryURLStore()
+    return _store
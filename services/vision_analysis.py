@@ -1,12 +1,39 @@
-import requests
+import asyncio
+import hashlib
 from pydantic import BaseModel, Field
-from google import genai
-from google.genai import types
 from io import BytesIO
-from dotenv import load_dotenv
-import os
+from config.settings import settings
+from services.image_fetch import download_image
+from services.clients import get_clients
+from services.stage_limits import UNLIMITED
+from services.preprocessing import preprocess_images
+from services.vision_backends import get_vision_batcher
+from services.metrics import span
+from exceptions.errors import NoValidImagesError
+
+# "product" sends all images in one call; "per_image" scores images
+# (or groups of IMAGES_PER_CALL) concurrently and Stage 3 combines them
+ANALYSIS_MODE = settings.analysis_mode
+IMAGES_PER_CALL = settings.images_per_call
+
+PROMPT_TEMPLATE = """
+    Analyze these images of a {category} (ID: {product_id}).
+    
+    Examine the visual details for:
+    1. Gender expression (Masculine/Feminine cues)
+    2. Visual weight (Thick/Heavy vs Thin/Light)
+    3. Embellishments (Decorations, studs, crystals)
+    4. Unconventionality (How unique or weird it is)
+    5. Formality (Casual vs Formal)
+    
+    Also identify dominant colors, textures, and transparency.
+    """
 
-load_dotenv()  # loads .env into environment
+# Changes whenever the prompt/rubric or the way images are grouped changes,
+# so stored results from an older prompt are re-scored
+PROMPT_VERSION = hashlib.sha256(
+    f"{PROMPT_TEMPLATE}|{ANALYSIS_MODE}|{IMAGES_PER_CALL}".encode()
+).hexdigest()[:12]
 
 # API_KEY = os.getenv("GEMINI_API_KEY")
 
@@ -46,84 +73,104 @@ class ProductAnalysisOutput(BaseModel):
 
 # --- 3. HELPER FUNCTIONS ---
 
-def download_image_bytes(url: str):
-    """Downloads image and returns raw bytes + mime type."""
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        # We need bytes for the new SDK, not just a PIL object
-        return response.content, response.headers.get('Content-Type', 'image/jpeg')
-    except Exception as e:
-        print(f"  [!] Error downloading {url}: {e}")
-        return None, None
-
-def analyze_product(payload: dict):
+async def collect_images(urls: list, buffer=None, progress=None):
+    """
+    Returns (bytes, mime type) for every url, in order.
+
+    Images already fetched by Stage 1 come from the buffer,
+    the rest are downloaded concurrently over the shared pool.
+    `progress(event, data)` is told about each image as it is ready.
+    """
+    done = 0
+
+    async def load(url):
+        nonlocal done
+        cached = buffer.get(url) if buffer is not None else None
+        image = cached or await download_image(get_clients(), url)
+        done += 1
+        if progress:
+            progress("download", {
+                "url": url,
+                "ok": image[0] is not None,
+                "from_buffer": bool(cached),
+                "done": done,
+                "total": len(urls),
+            })
+        return image
+
+    return await asyncio.gather(*(load(url) for url in urls))
+
+async def call_model(product_id: str, prompt: str, images: list, limits=UNLIMITED) -> dict:
+    """
+    One analysis through the configured vision backend (VISION_BACKEND);
+    concurrent calls are micro-batched. Returns a ProductAnalysisOutput dict.
+    """
+    async with limits.inference:
+        with span("inference"):
+            result = await get_vision_batcher().submit(
+                {"product_id": product_id, "prompt": prompt, "images": images}
+            )
+
+    # The product ID is ours, not something the model should get to rewrite
+    result["product_id"] = product_id
+    return result
+
+async def analyze_product(payload: dict, buffer=None, limits=UNLIMITED, progress=None):
+    """
+    Stage-2: downloads what Stage 1 did not keep, preprocesses and
+    sends the images to the vision backend. `progress(event, data)`,
+    if given, receives download / preprocess / inference events.
+    """
     product_id = str(payload.get("product_id"))
     category = payload.get("category", "Item")
     urls = payload.get("valid_images", [])
     
     print(f"--- Processing {category} (ID: {product_id}) ---")
 
-    API_KEY = os.getenv("GEMINI_API_KEY")
-
-    client = genai.Client(api_key=API_KEY)
-
-    if not API_KEY:
-        raise ValueError("API key error")
-
-    # A. Prepare Content List
-    # The new SDK accepts a list containing text and "Part" objects for images
-    prompt_text = f"""
-    Analyze these images of a {category} (ID: {product_id}).
-    
-    Examine the visual details for:
-    1. Gender expression (Masculine/Feminine cues)
-    2. Visual weight (Thick/Heavy vs Thin/Light)
-    3. Embellishments (Decorations, studs, crystals)
-    4. Unconventionality (How unique or weird it is)
-    5. Formality (Casual vs Formal)
+    # A. Prepare the prompt
+    prompt_text = PROMPT_TEMPLATE.format(category=category, product_id=product_id)
     
-    Also identify dominant colors, textures, and transparency.
-    """
+    # B. Collect Images (reuse Stage-1 bytes, download only what is missing)
+    missing = [url for url in urls if buffer is None or url not in buffer]
+    print(f"  Reusing {len(urls) - len(missing)} buffered images, downloading {len(missing)}...")
     
-    contents = [prompt_text]
+    async with limits.download:
+        with span("download"):
+            images = await collect_images(urls, buffer, progress)
+
+    # Shrink to the model's useful resolution before upload
+    with span("preprocess"):
+        images, stats = await preprocess_images(images)
+    if stats["images"]:
+        saved = stats["bytes_in"] - stats["bytes_out"]
+        print(
+            f"  Preprocessed {stats['images']} images: {stats['bytes_in']} -> {stats['bytes_out']} bytes"
+            f" (saved {saved} bytes, {100 * saved / max(stats['bytes_in'], 1):.0f}%)"
+        )
+    if progress:
+        progress("preprocess", stats)
 
-    # B. Download and Append Images
-    print(f"  Downloading {len(urls)} images...")
-    valid_count = 0
-    
-    for url in urls:
-        img_bytes, mime_type = download_image_bytes(url)
-        if img_bytes:
-            # New SDK Syntax: Create a 'Part' from bytes
-            image_part = types.Part.from_bytes(data=img_bytes, mime_type=mime_type)
-            contents.append(image_part)
-            valid_count += 1
+    image_parts = [(img_bytes, mime_type) for img_bytes, mime_type in images if img_bytes]
             
-    if valid_count == 0:
-        return {"error": "No valid images available."}
-
-    # C. Call Gemini (New Syntax)
-    print("  Sending data to Gemini...")
-    
-    try:
-        response = client.models.generate_content(
-            model='gemini-3-flash-preview',
-            contents=contents,
-            config=types.GenerateContentConfig(
-                response_mime_type='application/json',
-                response_schema=ProductAnalysisOutput 
-            )
-        )
-        
-        # With the new SDK, response.parsed is automatically a Python object!
-        # We convert it back to dict for generic usage/printing
-        return response.parsed.model_dump()
-        
-    except Exception as e:
-        return {"error": f"API Error: {e}"}
+    if not image_parts:
+        raise NoValidImagesError("No valid images available.")
+
+    # C. Call the vision backend (async, so the event loop keeps serving other requests)
+    if ANALYSIS_MODE == "per_image" and len(image_parts) > 1:
+        groups = [image_parts[i:i + IMAGES_PER_CALL] for i in range(0, len(image_parts), IMAGES_PER_CALL)]
+        print(f"  Sending {len(groups)} image groups to the vision backend in parallel...")
+        if progress:
+            progress("inference", {"calls": len(groups), "images": len(image_parts)})
+        analyses = await asyncio.gather(*(
+            call_model(product_id, prompt_text, group, limits) for group in groups
+        ))
+        # Stage 3 combines these into one product-level result
+        return {"product_id": product_id, "image_analyses": list(analyses)}
+
+    print("  Sending data to the vision backend...")
+    if progress:
+        progress("inference", {"calls": 1, "images": len(image_parts)})
+    return await call_model(product_id, prompt_text, image_parts, limits)
 
 # --- 4. EXECUTION ---
 # Your Payload
@@ -149,7 +196,7 @@ def analyze_product(payload: dict):
 # }
 
 # if __name__ == "__main__":
-#     result = analyze_product(test_payload)
+#     result = asyncio.run(analyze_product(test_payload))
 #     import json
 #     print("\n--- FINAL OUTPUT ---")
 #     print(json.dumps(result, indent=2))
\ No newline at end of file
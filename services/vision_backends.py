@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+
+from config.settings import settings
+from services.clients import get_clients
+from services.model_governor import get_model_governor
+from exceptions.errors import ModelResponseError
+
+# gemini | stub
+VISION_BACKEND = settings.vision_backend
+VISION_MODEL = settings.vision_model
+
+# Micro-batching: analyses submitted within the window are sent as one batch
+VISION_BATCH_SIZE = settings.vision_batch_size
+VISION_BATCH_WINDOW_MS = settings.vision_batch_window_ms
+
+# Stub backend cost model: fixed cost per batch + cost per item, on N "devices"
+STUB_BATCH_LATENCY = settings.vision_stub_batch_latency
+STUB_ITEM_LATENCY = settings.vision_stub_item_latency
+STUB_CONCURRENCY = settings.vision_stub_concurrency
+
+DIMENSIONS = ("gender_expression", "visual_weight", "embellishment", "unconventionality", "formality")
+STUB_COLORS = ("Black", "Brown", "Gold", "Silver", "Transparent", "Blue", "Red", "Tortoise")
+STUB_TEXTURES = ("Matte", "Glossy", "Metallic", "Patterned")
+
+
+# Every backend takes a list of requests shaped like
+#   {"product_id": str, "prompt": str, "images": [(bytes, mime_type), ...]}
+# and returns a list of the same length holding, per request, the
+# ProductAnalysisOutput dict or the exception that request failed with.
+
+class VisionBackend:
+    """Stage-2 model interface."""
+
+    name = "base"
+    model_name = None
+
+    async def analyze(self, batch: list) -> list:
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+
+class GeminiBackend(VisionBackend):
+    """
+    Google Gemini through the shared model client and the governor.
+
+    The online API has no multi-request call, so a batch is fanned out
+    as concurrent calls; the batch still shares one rate-limit pass.
+    """
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = VISION_MODEL):
+        self.model_name = model_name
+
+    async def _analyze_one(self, request: dict) -> dict:
+        from google.genai import types
+        from services.vision_analysis import ProductAnalysisOutput
+
+        client = get_clients().model
+        contents = [request["prompt"]] + [
+            types.Part.from_bytes(data=data, mime_type=mime_type) for data, mime_type in request["images"]
+        ]
+        # The governor rate-limits, retries with backoff and fails fast when the model is down
+        response = await get_model_governor().call(
+            lambda: client.aio.models.generate_content(
+                model=self.model_name,
+                contents=contents,
+                config=types.GenerateContentConfig(
+                    response_mime_type='application/json',
+                    response_schema=ProductAnalysisOutput
+                )
+            )
+        )
+
+        # response.parsed is the pydantic object; callers work with dicts
+        if response.parsed is None:
+            raise ModelResponseError("Model returned no parseable analysis")
+        return response.parsed.model_dump()
+
+    async def analyze(self, batch: list) -> list:
+        return await asyncio.gather(*(self._analyze_one(r) for r in batch), return_exceptions=True)
+
+
+class StubBackend(VisionBackend):
+    """
+    Deterministic offline backend: the output depends only on the
+    image bytes, and each call costs STUB_BATCH_LATENCY plus
+    STUB_ITEM_LATENCY per item on STUB_CONCURRENCY devices, like a
+    local GPU model where batching amortises the fixed cost.
+    """
+
+    name = "stub"
+
+    def __init__(self, batch_latency=STUB_BATCH_LATENCY, item_latency=STUB_ITEM_LATENCY, concurrency=STUB_CONCURRENCY):
+        self.model_name = "stub-v1"
+        self.batch_latency = batch_latency
+        self.item_latency = item_latency
+        self._devices = asyncio.Semaphore(concurrency)
+        self.calls = 0
+
+    @staticmethod
+    def fake_analysis(request: dict) -> dict:
+        digest = hashlib.sha256()
+        for data, _ in request["images"]:
+            digest.update(hashlib.sha256(data).digest())
+        seed = digest.digest()
+
+        return {
+            "product_id": str(request["product_id"]),
+            "visual_measurements": {
+                # Scores on a 0.5 grid in [-5, 5], confidences in [0.5, 0.95]
+                dimension: {
+                    "score": seed[i] % 21 / 2 - 5.0,
+                    "confidence": round(0.5 + seed[i + 8] % 10 * 0.05, 2),
+                    "reasoning": "stub",
+                }
+                for i, dimension in enumerate(DIMENSIONS)
+            },
+            "visual_attributes": {
+                "dominant_colors": sorted({STUB_COLORS[b % len(STUB_COLORS)] for b in seed[16:18]}),
+                "transparency": ("Opaque", "Semi-transparent", "Transparent")[seed[18] % 3],
+                "textures": [STUB_TEXTURES[seed[19] % len(STUB_TEXTURES)]],
+                "wirecore_visible": (None, True, False)[seed[20] % 3],
+            },
+            "ambiguities": [],
+        }
+
+    async def analyze(self, batch: list) -> list:
+        async with self._devices:
+            self.calls += 1
+            await asyncio.sleep(self.batch_latency + self.item_latency * len(batch))
+        return [self.fake_analysis(request) for request in batch]
+
+
+class MicroBatcher:
+    """
+    Groups concurrent `submit()` calls into backend batches.
+
+    The first pending request opens a window of `window` seconds; the
+    batch is sent when the window closes or `max_size` requests are
+    waiting, whichever comes first. Each caller gets its own result
+    or exception back.
+    """
+
+    def __init__(self, backend: VisionBackend, max_size: int = VISION_BATCH_SIZE, window: float = VISION_BATCH_WINDOW_MS / 1000):
+        self.backend = backend
+        self.max_size = max_size
+        self.window = window
+        self._pending = []
+        self._timer = None
+        # Batches in flight; held here so they are not garbage-collected mid-call
+        self._tasks = set()
+        self.stats = {"batches": 0, "items": 0}
+
+    async def submit(self, request: dict) -> dict:
+        if self.max_size == 1:
+            result = (await self._send([request]))[0]
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._pending.append((request, future))
+            if len(self._pending) >= self.max_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+            result = await future
+
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list) -> list:
+        self.stats["batches"] += 1
+        self.stats["items"] += len(batch)
+        results = await self.backend.analyze(batch)
+        if len(results) != len(batch):
+            raise ModelResponseError(f"{self.backend.name} returned {len(results)} results for {len(batch)} requests")
+        return results
+
+    async def _run(self, batch: list):
+        try:
+            results = await self._send([request for request, _ in batch])
+        except asyncio.CancelledError:
+            # Shutting down: don't leave the callers waiting forever
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            # A caller that was cancelled no longer wants its result
+            if not future.done():
+                future.set_result(result)
+
+    async def aclose(self, timeout: float = 10.0):
+        """Sends what is still waiting, lets in-flight batches finish, cancels them after `timeout`."""
+        self._flush()
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def build_vision_backend(name: str = VISION_BACKEND) -> VisionBackend:
+    if name == "stub":
+        return StubBackend()
+    if name == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Unknown VISION_BACKEND: {name}")
+
+
+# --- Process-wide backend ---
+_batcher = None
+
+def get_vision_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher(build_vision_backend())
+    return _batcher
+
+def get_vision_backend() -> VisionBackend:
+    return get_vision_batcher().backend
+
+async def close_vision_backend():
+    global _batcher
+    if _batcher is not None:
+        await _batcher.aclose()
+        await _batcher.backend.aclose()
+        _batcher = None
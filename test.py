@@ -1,19 +1,27 @@
+from schemas.request import ProductIngestRequest
 from services.image_validation import validate_product_images
 from services.vision_analysis import analyze_product
 from services.aggregation import aggregate_scores
+from services.clients import close_clients
 import asyncio
 import json
 
 
-def orchestrator(test_input : dict) -> dict:
-    result = asyncio.run(validate_product_images(test_input))
+async def run_pipeline(test_input : dict) -> dict:
+    result = await validate_product_images(ProductIngestRequest(**test_input))
     # print(json.dumps(result, indent=2))
-    result2 = analyze_product(result)
+    result2 = await analyze_product(result)
     # print(json.dumps(result2))
     result3 = aggregate_scores(result2)
+    # The shared clients are bound to this event loop
+    await close_clients()
     return result3
 
 
+def orchestrator(test_input : dict) -> dict:
+    return asyncio.run(run_pipeline(test_input))
+
+
 
 test_input1 = {
         "product_id": 231031,  # Note: It handles Int or String now
@@ -33,5 +41,6 @@ test_input1 = {
 # # print(json.dumps(result2))
 # result3 = aggregate_scores(result2)
 # print(json.dumps(result3, indent=2))
-result = orchestrator(test_input1)
-print(json.dumps(result, indent=2))
\ No newline at end of file
+if __name__ == "__main__":
+    result = orchestrator(test_input1)
+    print(result.model_dump_json(indent=2))
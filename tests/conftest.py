@@ -0,0 +1,25 @@
+import asyncio
+
+import httpx
+import pytest
+
+
+class MockClients:
+    """Stands in for the ClientRegistry, answering every request with `handler`."""
+
+    def __init__(self, handler):
+        self.requests = []
+
+        def record(request):
+            self.requests.append(request)
+            return handler(request)
+
+        self.http = httpx.AsyncClient(transport=httpx.MockTransport(record))
+
+    def host_slot(self, url):
+        return asyncio.Semaphore(1)
+
+
+@pytest.fixture
+def mock_clients():
+    return MockClients
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from services.aggregation import combine_measurements, merge_attributes
+
+
+def combine(scores, confidences=None):
+    scores = np.array(scores, dtype=float).reshape(len(scores), -1)
+    confidences = np.full_like(scores, 0.9) if confidences is None else np.array(confidences, dtype=float).reshape(scores.shape)
+    final_scores, final_confidences = combine_measurements(scores, confidences)
+    return final_scores[0], final_confidences[0]
+
+
+def test_outlier_rejected_when_most_images_agree():
+    # MAD is 0 here; the -5 must still be dropped
+    score, confidence = combine([2, 2, -5])
+    assert score == pytest.approx(2.0)
+    assert confidence == pytest.approx(0.9)
+
+
+def test_outlier_rejected_with_nonzero_mad():
+    score, _ = combine([2, 2.5, -5, 2])
+    assert score == pytest.approx(6.5 / 3)
+
+
+def test_two_images_never_reject():
+    score, _ = combine([2, -4])
+    assert score == pytest.approx(-1.0)
+
+
+def test_identical_scores_keep_everything():
+    score, confidence = combine([3, 3, 3, 3], [0.6, 0.8, 0.6, 0.8])
+    assert score == pytest.approx(3.0)
+    assert confidence == pytest.approx(0.7)
+
+
+def test_score_is_confidence_weighted():
+    score, _ = combine([1, 3], [0.25, 0.75])
+    assert score == pytest.approx(2.5)
+
+
+def test_disagreement_lowers_confidence():
+    _, agreeing = combine([1, 1.5, 1])
+    _, spread = combine([-2, 0, 2])
+    assert spread < agreeing
+
+
+def test_scores_and_confidences_are_clipped():
+    score, confidence = combine([9], [1.5])
+    assert score == 5.0
+    assert confidence == 1.0
+
+
+def test_dimensions_are_independent():
+    scores = np.array([[2, 0], [2, 1], [-5, 2]], dtype=float)
+    final_scores, _ = combine_measurements(scores, np.full_like(scores, 0.9))
+    assert final_scores[0] == pytest.approx(2.0)
+    assert final_scores[1] == pytest.approx(1.0)
+
+
+def test_merge_attributes_votes():
+    merged = merge_attributes([
+        {"dominant_colors": ["Black", "Gold"], "transparency": "Opaque", "textures": ["Matte"], "wirecore_visible": False},
+        {"dominant_colors": ["Black"], "transparency": "Opaque", "textures": ["Matte", "Glossy"], "wirecore_visible": True},
+        {"dominant_colors": ["Black", "Red"], "transparency": "Transparent", "textures": None},
+    ])
+    assert merged["dominant_colors"][0] == "Black"
+    assert set(merged["dominant_colors"]) == {"Black", "Gold", "Red"}
+    assert merged["transparency"] == "Opaque"
+    assert merged["textures"] == ["Matte", "Glossy"]
+    assert merged["wirecore_visible"] is True
+
+
+def test_merge_attributes_caps_colors_and_handles_missing():
+    merged = merge_attributes([{"dominant_colors": [f"c{i}" for i in range(8)]}, {}])
+    assert len(merged["dominant_colors"]) == 5
+    assert merged["transparency"] is None
+    assert merged["textures"] == []
+    assert merged["wirecore_visible"] is None
@@ -0,0 +1,22 @@
+import argparse
+
+import pytest
+from fastapi.testclient import TestClient
+
+from analyze_catalog import positive_int
+from main import app
+
+
+@pytest.mark.parametrize("query", ["inference_concurrency=-1", "download_concurrency=0", "validation_concurrency=-5"])
+def test_batch_endpoint_rejects_non_positive_limits(query):
+    response = TestClient(app).post(
+        f"/api/v1/analyze-products?{query}", content=b"", headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 422
+
+
+def test_cli_rejects_non_positive_limits():
+    assert positive_int("4") == 4
+    for value in ("0", "-1"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            positive_int(value)
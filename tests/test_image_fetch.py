@@ -0,0 +1,140 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import image_validation
+from services.image_fetch import IMAGE_MAX_BYTES, SNIFF_BYTES, ImageTooLargeError, fetch_image, sniff_image_type
+from services.image_validation import check_headers_only, check_response
+
+URL = "http://cdn.test/a.jpg"
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 60
+
+
+@pytest.mark.parametrize("head, mime_type", [
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n\x00\x00", "image/png"),
+    (b"GIF87a\x01\x00", "image/gif"),
+    (b"GIF89a\x01\x00", "image/gif"),
+    (b"BM\x00\x00\x00\x00", "image/bmp"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"\x00\x00\x00\x1cftypavif\x00\x00", "image/avif"),
+    (b"\x00\x00\x00\x1cftypheic\x00\x00", "image/heic"),
+    (b"<!DOCTYPE html>", None),
+    (b"RIFF\x00\x00\x00\x00WAVEfmt ", None),
+    (b"", None),
+])
+def test_sniff_image_type(head, mime_type):
+    assert sniff_image_type(head) == mime_type
+
+
+def image_response(body=JPEG, status=200, **headers):
+    return httpx.Response(status, headers={"content-type": "image/jpeg", **headers}, content=body)
+
+
+def fetch(mock_clients, handler, **kwargs):
+    clients = mock_clients(handler)
+    return asyncio.run(fetch_image(clients, URL, **kwargs)), clients.requests
+
+
+def test_fetch_returns_the_body(mock_clients):
+    (response, body), _ = fetch(mock_clients, lambda r: image_response())
+    assert response.status_code == 200
+    assert body == JPEG
+
+
+def test_fetch_rejects_declared_size_over_the_cap(mock_clients):
+    with pytest.raises(ImageTooLargeError):
+        fetch(mock_clients, lambda r: image_response(b"x" * 100), max_bytes=50)
+
+
+def test_fetch_aborts_mid_stream_without_content_length(mock_clients):
+    chunks_sent = []
+
+    async def stream():
+        for _ in range(10):
+            chunks_sent.append(1)
+            yield b"x" * 40
+
+    with pytest.raises(ImageTooLargeError):
+        fetch(mock_clients, lambda r: httpx.Response(200, content=stream()), max_bytes=100)
+    # Reading stopped at the chunk that crossed the cap
+    assert len(chunks_sent) == 3
+
+
+def test_fetch_first_chunk_only_sends_a_range(mock_clients):
+    (response, body), requests = fetch(
+        mock_clients, lambda r: image_response(status=206, **{"content-range": "bytes 0-63/64"}), first_chunk_only=True
+    )
+    assert requests[0].headers["range"] == f"bytes=0-{SNIFF_BYTES - 1}"
+    assert body == JPEG
+
+
+def test_fetch_error_status_has_no_body(mock_clients):
+    (response, body), _ = fetch(mock_clients, lambda r: httpx.Response(404, content=b"not found"))
+    assert response.status_code == 404
+    assert body == b""
+
+
+def test_check_response_rules():
+    assert check_response(image_response(), JPEG) is None
+    assert check_response(httpx.Response(404)) == "HTTP Status 404"
+    assert check_response(image_response(**{"content-type": "text/html"})).startswith("Invalid Content-Type")
+    assert check_response(image_response(), b"<html>") == "Unrecognised image file signature"
+
+
+def test_check_response_size_cap(monkeypatch):
+    monkeypatch.setattr(image_validation, "IMAGE_MAX_BYTES", 1000)
+    assert check_response(image_response(b"x" * 1001), None).startswith("Image too large")
+    # A ranged reply declares the full size in Content-Range, not Content-Length
+    ranged = image_response(status=206, **{"content-range": "bytes 0-63/5000"})
+    assert check_response(ranged, JPEG) == "Image too large: 5000 bytes"
+    assert check_response(image_response(status=206, **{"content-range": "bytes 0-63/500"}), JPEG) is None
+
+
+def test_headers_only_uses_head_when_it_answers(mock_clients):
+    clients = mock_clients(lambda r: image_response(b"" if r.method == "HEAD" else JPEG))
+    response, head = asyncio.run(check_headers_only(clients, URL))
+    assert [r.method for r in clients.requests] == ["HEAD"]
+    assert head is None
+    assert check_response(response, head) is None
+
+
+@pytest.mark.parametrize("head_response", [
+    httpx.Response(405),
+    httpx.Response(200, headers={"content-type": "application/octet-stream"}),
+])
+def test_headers_only_falls_back_to_a_ranged_get(mock_clients, head_response):
+    def handler(request):
+        if request.method == "HEAD":
+            return head_response
+        return image_response(status=206, **{"content-range": "bytes 0-63/64"})
+
+    clients = mock_clients(handler)
+    response, head = asyncio.run(check_headers_only(clients, URL))
+    assert [r.method for r in clients.requests] == ["HEAD", "GET"]
+    assert clients.requests[1].headers["range"] == f"bytes=0-{SNIFF_BYTES - 1}"
+    assert head == JPEG
+    assert check_response(response, head) is None
+
+
+def test_headers_only_keeps_a_304(mock_clients):
+    clients = mock_clients(lambda r: httpx.Response(304))
+    response, head = asyncio.run(check_headers_only(clients, URL, {"If-None-Match": '"v1"'}))
+    assert response.status_code == 304
+    assert [r.method for r in clients.requests] == ["HEAD"]
+
+
+def test_oversized_stream_rejects_the_url(mock_clients, monkeypatch):
+    chunk = b"x" * 2**20
+
+    async def stream():
+        while True:
+            yield chunk
+
+    monkeypatch.setattr(image_validation, "get_url_store", lambda: None)
+    monkeypatch.setattr(image_validation, "VALIDATION_MODE", "full")
+    clients = mock_clients(lambda r: httpx.Response(200, headers={"content-type": "image/jpeg"}, content=stream()))
+    url, ok, reason = asyncio.run(image_validation.check_single_url(clients, URL))
+    assert not ok
+    assert reason == f"Image exceeds {IMAGE_MAX_BYTES} bytes"
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import pytest
+
+from exceptions.errors import ModelUnavailableError
+from services.model_governor import CircuitBreaker, ModelGovernor
+
+
+def make_governor(threshold=2, reset_timeout=0.05):
+    governor = ModelGovernor(max_retries=0, backoff_base=0, backoff_max=0)
+    governor.breaker = CircuitBreaker(threshold=threshold, reset_timeout=reset_timeout)
+    return governor
+
+
+async def ok():
+    return "ok"
+
+
+async def timeout():
+    raise asyncio.TimeoutError()
+
+
+async def bad_request():
+    raise ValueError("bad request")
+
+
+async def hang():
+    await asyncio.sleep(10)
+
+
+def open_breaker(governor):
+    for _ in range(governor.breaker.threshold):
+        with pytest.raises(ModelUnavailableError):
+            asyncio.run(governor.call(timeout))
+    assert governor.breaker.state == "open"
+
+
+def test_breaker_opens_after_threshold_and_rejects():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+    assert breaker.check() is False
+    breaker.on_failure()
+    assert breaker.state == "closed"
+    breaker.on_failure()
+    assert breaker.state == "open"
+    with pytest.raises(ModelUnavailableError):
+        breaker.check()
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.on_failure()
+    assert breaker.state == "half_open"
+    assert breaker.check() is True
+    with pytest.raises(ModelUnavailableError):
+        breaker.check()
+    breaker.on_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0.05)
+    breaker.on_failure()
+    time.sleep(0.06)
+    assert breaker.check() is True
+    breaker.on_failure()
+    assert breaker.state == "open"
+
+
+def test_governor_closes_after_successful_trial():
+    governor = make_governor()
+    open_breaker(governor)
+    with pytest.raises(ModelUnavailableError):
+        asyncio.run(governor.call(ok))
+    time.sleep(0.06)
+    assert asyncio.run(governor.call(ok)) == "ok"
+    assert governor.breaker.state == "closed"
+
+
+def test_non_retryable_trial_closes_breaker():
+    governor = make_governor()
+    open_breaker(governor)
+    time.sleep(0.06)
+    # The model answered, it just did not like the request
+    with pytest.raises(ValueError):
+        asyncio.run(governor.call(bad_request))
+    assert governor.breaker.state == "closed"
+    assert asyncio.run(governor.call(ok)) == "ok"
+
+
+def test_cancelled_trial_frees_the_slot():
+    governor = make_governor()
+    open_breaker(governor)
+    time.sleep(0.06)
+
+    async def cancel_trial():
+        task = asyncio.create_task(governor.call(hang))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert governor.breaker.state == "half_open"
+    assert governor.concurrency.in_flight == 0
+    assert asyncio.run(governor.call(ok)) == "ok"
+    assert governor.breaker.state == "closed"
@@ -0,0 +1,60 @@
+import time
+
+from services import result_cache
+from services.result_cache import MemoryCache, SQLiteCache
+
+
+def test_sqlite_cache_round_trip(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    assert cache.get("k") is None
+    cache.set("k", {"score": 1})
+    assert cache.get("k") == {"score": 1}
+    assert cache.stats() == {"backend": "sqlite", "hits": 1, "misses": 1, "entries": 1}
+
+
+def test_sqlite_cache_purges_expired_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "CACHE_PURGE_INTERVAL", 0)
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=0.01)
+    cache.set("old", {"score": 1})
+    time.sleep(0.02)
+    # Expired rows are never counted as entries
+    assert cache.stats()["entries"] == 0
+
+    cache.ttl = 60
+    cache.set("new", {"score": 2})
+    (rows,) = cache._db.execute("SELECT COUNT(*) FROM results").fetchone()
+    assert rows == 1
+    assert cache.get("old") is None
+
+
+def test_sqlite_cache_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "CACHE_PURGE_INTERVAL", 0)
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=60, max_entries=3)
+    for i in range(5):
+        cache.set(f"k{i}", {"i": i})
+    assert cache.stats()["entries"] == 3
+    assert cache.get("k0") is None
+    assert cache.get("k4") == {"i": 4}
+
+
+def test_sqlite_cache_purges_on_open(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, ttl=0.01)
+    cache.set("old", {"score": 1})
+    time.sleep(0.02)
+    reopened = SQLiteCache(path)
+    (rows,) = reopened._db.execute("SELECT COUNT(*) FROM results").fetchone()
+    assert rows == 0
+
+
+def test_memory_cache_lru_and_ttl():
+    cache = MemoryCache(max_entries=2, ttl=60)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    cache.ttl = -1
+    cache.set("d", {"v": 4})
+    assert cache.get("d") is None
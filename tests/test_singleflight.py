@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        return flight, results
+
+    flight, results = asyncio.run(run())
+    assert len(calls) == 1
+    assert [r for r, _ in results] == ["done"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert len(flight) == 0
+
+
+def test_errors_are_shared_and_not_cached():
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        flight = SingleFlight()
+        first = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        with pytest.raises(ValueError):
+            await flight.do("k", fail)
+        return first
+
+    first = asyncio.run(run())
+    assert all(isinstance(e, ValueError) for e in first)
+    assert len(calls) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        flight = SingleFlight()
+        leaver = asyncio.ensure_future(flight.do("k", work))
+        stayer = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        leaver.cancel()
+        return await stayer
+
+    assert asyncio.run(run()) == ("done", True)
@@ -0,0 +1,115 @@
+import asyncio
+import sqlite3
+import time
+
+import httpx
+
+from services import image_validation, url_metadata
+from services.url_metadata import MemoryURLStore, SQLiteURLStore, conditional_headers, is_fresh
+
+URL = "http://cdn.test/a.jpg"
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryURLStore(max_entries=2)
+    store.put("a", {"status": 200})
+    store.put("b", {"status": 200})
+    store.get("a")
+    store.put("c", {"status": 200})
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.get("c") is not None
+
+
+def meta(**overrides):
+    return {
+        "status": 200, "valid": True, "content_type": "image/jpeg", "etag": '"v1"',
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT", "content_hash": "abc", "checked_at": time.time(),
+        **overrides,
+    }
+
+
+def test_conditional_headers_only_for_valid_urls():
+    assert conditional_headers(meta()) == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert conditional_headers(meta(valid=False)) == {}
+    assert conditional_headers(meta(status=404)) == {}
+    assert conditional_headers(None) == {}
+
+
+def test_is_fresh_needs_a_valid_recent_check(monkeypatch):
+    monkeypatch.setattr(url_metadata, "URL_METADATA_MAX_AGE", 60)
+    assert is_fresh(meta())
+    assert not is_fresh(meta(valid=False))
+    assert not is_fresh(meta(checked_at=time.time() - 120))
+    monkeypatch.setattr(url_metadata, "URL_METADATA_MAX_AGE", 0)
+    assert not is_fresh(meta())
+
+
+def probe(monkeypatch, mock_clients, store, handler):
+    monkeypatch.setattr(image_validation, "get_url_store", lambda: store)
+    monkeypatch.setattr(image_validation, "VALIDATION_MODE", "full")
+    clients = mock_clients(handler)
+    return asyncio.run(image_validation.probe_url(clients, URL)), clients.requests
+
+
+def test_304_does_not_validate_a_rejected_url(monkeypatch, mock_clients):
+    store = MemoryURLStore()
+    store.put(URL, meta(valid=False, content_type="text/html"))
+
+    (reason, body, _, _), requests = probe(monkeypatch, mock_clients, store, lambda r: httpx.Response(304))
+    assert reason == "HTTP Status 304"
+    assert "if-none-match" not in requests[0].headers
+    assert store.get(URL)["valid"] is False
+
+
+def test_304_revalidates_a_valid_url(monkeypatch, mock_clients):
+    store = MemoryURLStore()
+    store.put(URL, meta(checked_at=0))
+
+    (reason, body, content_type, content_hash), requests = probe(
+        monkeypatch, mock_clients, store, lambda r: httpx.Response(304)
+    )
+    assert reason is None and body is None
+    assert (content_type, content_hash) == ("image/jpeg", "abc")
+    assert requests[0].headers["if-none-match"] == '"v1"'
+    assert store.get(URL)["checked_at"] > 0
+
+
+def test_rejected_response_is_stored_invalid(monkeypatch, mock_clients):
+    store = MemoryURLStore()
+    html = lambda r: httpx.Response(200, headers={"content-type": "text/html", "etag": '"p"'}, content=b"<html>")
+
+    (reason, _, _, _), _ = probe(monkeypatch, mock_clients, store, html)
+    assert reason.startswith("Invalid Content-Type")
+    assert store.get(URL)["valid"] is False
+    assert conditional_headers(store.get(URL)) == {}
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    store = SQLiteURLStore(str(tmp_path / "urls.sqlite3"))
+    store.put(URL, meta())
+    stored = store.get(URL)
+    assert stored["valid"] == 1
+    assert conditional_headers(stored)["If-None-Match"] == '"v1"'
+
+
+def test_sqlite_store_migrates_old_files(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE url_metadata (url TEXT PRIMARY KEY, status INTEGER, content_type TEXT,"
+        " etag TEXT, last_modified TEXT, content_hash TEXT, checked_at REAL)"
+    )
+    db.execute("INSERT INTO url_metadata VALUES (?, 200, 'text/html', '\"p\"', NULL, NULL, ?)", (URL, time.time()))
+    db.commit()
+    db.close()
+
+    store = SQLiteURLStore(path)
+    stored = store.get(URL)
+    # Rows from before the flag existed must be fully re-checked
+    assert stored["valid"] == 0
+    assert conditional_headers(stored) == {}
+    store.put(URL, meta())
+    assert store.get(URL)["valid"] == 1
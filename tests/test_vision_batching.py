@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from services.vision_backends import MicroBatcher, StubBackend
+
+
+def request(i):
+    return {"product_id": str(i), "prompt": "", "images": [(bytes([i]), "image/jpeg")]}
+
+
+def test_concurrent_submits_share_a_batch():
+    async def run():
+        batcher = MicroBatcher(StubBackend(batch_latency=0, item_latency=0), max_size=4, window=0.05)
+        results = await asyncio.gather(*(batcher.submit(request(i)) for i in range(6)))
+        await batcher.aclose()
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert [r["product_id"] for r in results] == [str(i) for i in range(6)]
+    assert batcher.stats == {"batches": 2, "items": 6}
+    assert not batcher._tasks
+
+
+def test_backend_error_reaches_every_caller():
+    class Broken(StubBackend):
+        async def analyze(self, batch):
+            raise RuntimeError("boom")
+
+    async def run():
+        batcher = MicroBatcher(Broken(), max_size=2, window=0.01)
+        return await asyncio.gather(*(batcher.submit(request(i)) for i in range(2)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+def test_aclose_cancels_stuck_batches():
+    async def run():
+        batcher = MicroBatcher(StubBackend(batch_latency=10, item_latency=0), max_size=2, window=0.01)
+        caller = asyncio.ensure_future(batcher.submit(request(1)))
+        await asyncio.sleep(0.05)
+        assert len(batcher._tasks) == 1
+        await batcher.aclose(timeout=0.05)
+        assert not batcher._tasks
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+    asyncio.run(run())
@@ -0,0 +1,31 @@
+import asyncio
+
+import orjson
+from pydantic import BaseModel
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def to_json(obj) -> bytes:
+    """
+    Shared JSON encoder for responses, NDJSON/SSE lines and the
+    on-disk stores. Pydantic models are serialized by pydantic-core
+    straight from the model; everything else goes through orjson.
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump_json().encode()
+    return orjson.dumps(obj, default=_default)
+
+
+async def store_call(store, method, *args):
+    """
+    Calls a cache/store method from async code. Stores that wait on
+    disk (`store.blocking`) run in a thread so the event loop stays free.
+    """
+    if store.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)